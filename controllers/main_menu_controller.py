@@ -56,6 +56,9 @@ def _main_menu_flow(stdscr):
         if choice.lower() == "start update" and main.current_aircraft_id:
             from controllers.update_controller import _update_flow
             _update_flow(stdscr, main.current_aircraft_id)
+        elif choice.lower() == "verify files" and main.current_aircraft_id:
+            from controllers.verify_controller import _verify_flow
+            _verify_flow(stdscr, main.current_aircraft_id)
         elif choice.lower() == "choose preset" and main.current_aircraft_id:
             from controllers.preset_selection_controller import _preset_selection_flow
             _preset_selection_flow(stdscr)
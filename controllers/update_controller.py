@@ -6,13 +6,17 @@ import views.ui_parts as ui
 from views.update_views import check_updates_screen, download_status_screen, downloads_summary_screen, confirm_deletion_screen, delete_status_screen, delete_summary_screen
 from controllers.exceptions import QuitFlow
 
-def check_for_updates(stdscr, aircraft_id):
+def check_for_updates(stdscr, aircraft_id, session=None):
     """
     Handles the update check flow
     Fetches remote updates and passes results to the view for processing
+    Without a session one is started here, so a bad remote_subfolder or an
+    unreachable server ends in the error popups below.
     """
     try:
-        status, data = main.get_remote_updates(aircraft_id)
+        if session is None:
+            session = main.UpdateSession(aircraft_id)
+        status, data = main.get_remote_updates(aircraft_id, session=session)
     
     except FileNotFoundError as e:
         ui.show_popup(stdscr, [
@@ -60,7 +64,8 @@ def check_for_updates(stdscr, aircraft_id):
 
     return {
         "download_files": download_files,
-        "delete_folders": delete_folders
+        "delete_folders": delete_folders,
+        "session": session
     }
 
 
@@ -81,33 +86,65 @@ def if_updates(download_files, delete_folders):
     return download_files, True
 
 
+def preflight_check(stdscr, download_files, aircraft_id, file_info):
+    """
+    Run the preflight planner before anything is downloaded.
+    Returns the plan, or None after telling the user the update does not fit on the disk.
+    A planner failure is logged and the update goes ahead without estimates.
+    """
+    try:
+        plan = main.plan_update(download_files, aircraft_id, file_info)
+    except Exception as e:
+        log_error(f"Preflight check failed, continuing without it: {e}")
+        return {}
+
+    if not plan["fits"]:
+        ui.show_popup(stdscr, [
+            "Not enough disk space for this update.",
+            f"Needed: {ui.format_size(plan['required_bytes'])}",
+            f"Free: {ui.format_size(plan['free_bytes'])}",
+            f"Liveries folder: {ui.truncate_path(main.liveries_folder, 50)}"
+        ], msg_type="error")
+        log_error(f"Update aborted, needs {plan['required_bytes']} bytes with {plan['free_bytes']} free")
+        return None
+    return plan
+
+
 def _update_flow(stdscr, aircraft_id):
     """
     Controller for orchestrating the update flow synchronously.
     Handles user choice, directs to download view, and returns control to main screen.
     """
-    aircraft_data = main.get_aircraft_info(aircraft_id)
     update_info = check_for_updates(stdscr, aircraft_id)
     if not update_info:
         # either an error occured or user canceled
         return
-    
+
+    # one session per flow, the remote version file is fetched once and shared
+    session = update_info["session"]
+    aircraft_data = main.get_aircraft_info(aircraft_id, session=session)
     download_files = update_info["download_files"]
     delete_folders = update_info["delete_folders"]
 
     download_files, is_updates = if_updates(download_files, delete_folders)
 
+    plan = None
+    if download_files and is_updates:
+        plan = preflight_check(stdscr, download_files, aircraft_id, session.file_info)
+        if plan is None:
+            return
+
     try:
         # remove folders that are already missing from delete_folders
         delete_folders = main.filter_existing_folders(delete_folders, aircraft_id)  
-        user_choice = check_updates_screen(stdscr, download_files, delete_folders, aircraft_data)
+        user_choice = check_updates_screen(stdscr, download_files, delete_folders, aircraft_data, session.file_info, plan)
         
         if user_choice != True:
             log_info("User canceled update process")
             return
         
         if download_files and is_updates:
-            download_statuses = download_status_screen(stdscr, aircraft_data, download_files)
+            download_statuses = download_status_screen(stdscr, aircraft_data, download_files, session.file_info)
             if download_statuses:
                 downloads_summary_screen(stdscr, aircraft_data, download_statuses)
         
@@ -117,7 +154,7 @@ def _update_flow(stdscr, aircraft_id):
                 folder_statuses = delete_status_screen(stdscr, delete_folders, aircraft_data)
                 if folder_statuses:
                     delete_summary_screen(stdscr, folder_statuses, aircraft_data)
-        main.clean_up_operation(True, True, False)
+        main.clean_up_operation(True, True, False, session=session)
         log_info("Update flow complete, returning to main screen", tag="UPDATE_FLOW")
     except QuitFlow:
         log_info("User quit the update flow")
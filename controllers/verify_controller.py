@@ -0,0 +1,62 @@
+import core.main as main
+from core.main import log_info, log_error
+import views.ui_parts as ui
+from views.update_views import verify_status_screen, download_status_screen, downloads_summary_screen
+from controllers.exceptions import QuitFlow
+
+
+def verify_summary_lines(report):
+    """Popup lines describing a main.verify_installation report."""
+    lines = [f"Checked {report['checked']} files, read {ui.format_size(report['bytes'])} in {ui.format_duration(report['seconds'])}"]
+    if report["skipped"]:
+        lines.append(f"{report['skipped']} file(s) unchanged since install were not read, set verify_full to read every file")
+    if report["bytes_per_second"]:
+        lines.append(f"Read at {ui.format_size(report['bytes_per_second'])}/s")
+    damaged_files = sum(len(paths) for paths in report["damaged"].values())
+    if damaged_files:
+        lines.append(f"{damaged_files} damaged or missing file(s) in {len(report['damaged'])} livery zip(s)")
+    if report["unrepairable"]:
+        lines.append(f"{len(report['unrepairable'])} damaged file(s) cannot be repaired, they were not installed from a zip")
+    if report["unverifiable"]:
+        lines.append(f"{len(report['unverifiable'])} file(s) from older installs have no checksum, they were only checked to exist (listed in the log)")
+    if not damaged_files and not report["unrepairable"]:
+        lines.append("All files that could be checked match." if report["unverifiable"] else "All installed files match.")
+    return lines
+
+
+def _verify_flow(stdscr, aircraft_id):
+    """
+    Controller for verifying a preset's installed files and repairing damaged ones.
+    Damaged files are fetched again through the normal download path,
+    only the liveries they belong to are touched.
+    """
+    try:
+        aircraft_data = main.get_aircraft_info(aircraft_id)
+        try:
+            report = verify_status_screen(stdscr, aircraft_data)
+        except Exception as e:
+            log_error(f"Verify failed: {e}")
+            ui.show_popup(stdscr, [
+                "Verify failed.",
+                f"Details: {e}",
+                f"Log file: {main.config['logging'].get('log_file_name', 'unknown')}"
+            ], msg_type="error")
+            return
+
+        lines = verify_summary_lines(report)
+        if not report["damaged"]:
+            ui.show_popup(stdscr, lines, msg_type="error" if report["unrepairable"] else "info")
+            return
+
+        if not ui.show_popup(stdscr, lines + ["", "Download the damaged files again?"], msg_type="confirm"):
+            log_info("User skipped the repair", tag="VERIFY")
+            return
+
+        repair_files, file_info = main.prepare_repair(report)
+        download_statuses = download_status_screen(stdscr, aircraft_data, repair_files, file_info)
+        if download_statuses:
+            downloads_summary_screen(stdscr, aircraft_data, download_statuses)
+        log_info(f"Repair of {len(repair_files)} zips complete, returning to main screen", tag="VERIFY")
+    except QuitFlow:
+        log_info("User quit the verify flow")
+        return
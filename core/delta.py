@@ -0,0 +1,227 @@
+"""
+Binary delta patches for files that were extracted from livery zips.
+
+A patch rebuilds one or more files from their previous content (the base)
+with two operations: copy a range of the base, or insert new bytes. Texture
+edits usually touch a few regions of a large DDS, so most of the file is
+copied and only the edited regions travel over the network.
+
+File layout, all integers little-endian:
+
+    magic       8 bytes  b"AERISDP1"
+    body        zlib stream of:
+        count       u32      number of files in the patch
+        per file:
+            path_len    u16
+            path        utf-8, relative to the preset folder, '/' separated
+            base_md5    16 bytes
+            result_md5  16 bytes
+            result_size u64
+            op_count    u32
+            per op:
+                kind    u8   0 = copy, 1 = insert
+                copy:   offset u64, length u64   (range of the base)
+                insert: length u64, then length bytes
+
+create_patch() builds patches, apply_patch() applies them.
+"""
+
+import hashlib
+import os
+import struct
+import zlib
+
+MAGIC = b"AERISDP1"
+OP_COPY = 0
+OP_INSERT = 1
+BLOCK_SIZE = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+class PatchError(Exception):
+    """The patch is damaged or produced a file that does not match its hash."""
+    pass
+
+
+class BaseMismatch(PatchError):
+    """The file on disk is not the content the patch was made against."""
+    pass
+
+
+class _ZlibReader:
+    """Reads exact byte counts from a zlib compressed file without inflating it all at once."""
+    def __init__(self, f):
+        self._f = f
+        self._decompressor = zlib.decompressobj()
+        self._buffer = b""
+
+    def read_exact(self, size):
+        while len(self._buffer) < size:
+            data = self._f.read(CHUNK_SIZE)
+            if not data:
+                self._buffer += self._decompressor.flush()
+                if len(self._buffer) < size:
+                    raise PatchError("Unexpected end of patch")
+                break
+            self._buffer += self._decompressor.decompress(data)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def unpack(self, fmt):
+        return struct.unpack(fmt, self.read_exact(struct.calcsize(fmt)))
+
+
+def file_md5(path):
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def apply_patch(patch_path, resolve_target, known_hash=None):
+    """
+    Apply every file in the patch at patch_path.
+    - resolve_target(relative path) returns the absolute path of the file to patch
+    - known_hash(absolute path) may return the md5 recorded for a file, a recorded
+      hash that differs from the patch's base fails without reading the file
+
+    Results go to temporary files and only replace the originals once every file
+    in the patch was rebuilt and matched its result hash, so a failure leaves
+    the folder as it was.
+    Returns [(absolute path, crc32, size, md5)] for the patched files.
+    Raises BaseMismatch if a base file differs, PatchError for a damaged patch.
+    """
+    done = []
+    try:
+        with open(patch_path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise PatchError(f"'{os.path.basename(patch_path)}' is not a patch file")
+            reader = _ZlibReader(f)
+            (count,) = reader.unpack("<I")
+            for _ in range(count):
+                (path_length,) = reader.unpack("<H")
+                relative_path = reader.read_exact(path_length).decode("utf-8")
+                base_md5 = reader.read_exact(16).hex()
+                result_md5 = reader.read_exact(16).hex()
+                result_size, op_count = reader.unpack("<QI")
+
+                target = resolve_target(relative_path)
+                recorded = known_hash(target) if known_hash else None
+                if recorded and recorded != base_md5:
+                    raise BaseMismatch(f"'{relative_path}' is recorded as {recorded}, patch expects {base_md5}")
+                if not os.path.isfile(target) or file_md5(target) != base_md5:
+                    raise BaseMismatch(f"'{relative_path}' on disk is not the patch's base")
+
+                temp_path = f"{target}.patching"
+                done.append((target, temp_path))
+                crc32, md5 = _rebuild(reader, op_count, target, temp_path)
+                if md5 != result_md5 or os.path.getsize(temp_path) != result_size:
+                    raise PatchError(f"Patched '{relative_path}' does not match the expected result")
+                done[-1] = (target, temp_path, crc32, result_size, md5)
+    except Exception:
+        for entry in done:
+            if os.path.exists(entry[1]):
+                os.remove(entry[1])
+        raise
+
+    results = []
+    for target, temp_path, crc32, size, md5 in done:
+        os.replace(temp_path, target)
+        results.append((target, crc32, size, md5))
+    return results
+
+
+def _rebuild(reader, op_count, base_path, out_path):
+    """Write the patched file to out_path, returns (crc32, md5) of what was written."""
+    crc32 = 0
+    md5 = hashlib.md5()
+    with open(base_path, "rb") as base, open(out_path, "wb") as out:
+        def write(data):
+            nonlocal crc32
+            out.write(data)
+            crc32 = zlib.crc32(data, crc32)
+            md5.update(data)
+
+        for _ in range(op_count):
+            (kind,) = reader.unpack("<B")
+            if kind == OP_COPY:
+                offset, length = reader.unpack("<QQ")
+                base.seek(offset)
+                while length:
+                    data = base.read(min(CHUNK_SIZE, length))
+                    if not data:
+                        raise PatchError("Copy reaches past the end of the base file")
+                    write(data)
+                    length -= len(data)
+            elif kind == OP_INSERT:
+                (length,) = reader.unpack("<Q")
+                while length:
+                    data = reader.read_exact(min(CHUNK_SIZE, length))
+                    write(data)
+                    length -= len(data)
+            else:
+                raise PatchError(f"Unknown patch operation {kind}")
+    return crc32, md5.hexdigest()
+
+
+def diff_files(base_path, new_path, block_size=BLOCK_SIZE):
+    """
+    Yield patch operations that turn base_path into new_path.
+    Blocks are compared at the same offset, which suits textures edited in place.
+    Yields (OP_COPY, offset, length) and (OP_INSERT, data), neighbours merged.
+    """
+    pending = None # (kind, offset, length) for copies, (kind, bytearray) for inserts
+    offset = 0
+    with open(base_path, "rb") as base, open(new_path, "rb") as new:
+        while True:
+            new_block = new.read(block_size)
+            if not new_block:
+                break
+            base_block = base.read(block_size)
+            if new_block == base_block:
+                if pending and pending[0] == OP_COPY:
+                    pending = (OP_COPY, pending[1], pending[2] + len(new_block))
+                else:
+                    if pending:
+                        yield pending
+                    pending = (OP_COPY, offset, len(new_block))
+            else:
+                if pending and pending[0] == OP_INSERT:
+                    pending[1].extend(new_block)
+                else:
+                    if pending:
+                        yield pending
+                    pending = (OP_INSERT, bytearray(new_block))
+            offset += len(new_block)
+    if pending:
+        yield pending
+
+
+def create_patch(patch_path, files, block_size=BLOCK_SIZE):
+    """
+    Write a patch to patch_path.
+    files is a list of (relative path, base file, new file), the relative path
+    being where the file sits inside the preset folder, eg. 'F4E_Livery/tex.dds'.
+    """
+    compressor = zlib.compressobj(9)
+    with open(patch_path, "wb") as out:
+        out.write(MAGIC)
+
+        def write(data):
+            out.write(compressor.compress(data))
+
+        write(struct.pack("<I", len(files)))
+        for relative_path, base_path, new_path in files:
+            ops = list(diff_files(base_path, new_path, block_size))
+            name = relative_path.replace("\\", "/").encode("utf-8")
+            write(struct.pack("<H", len(name)) + name)
+            write(bytes.fromhex(file_md5(base_path)) + bytes.fromhex(file_md5(new_path)))
+            write(struct.pack("<QI", os.path.getsize(new_path), len(ops)))
+            for op in ops:
+                if op[0] == OP_COPY:
+                    write(struct.pack("<BQQ", OP_COPY, op[1], op[2]))
+                else:
+                    write(struct.pack("<BQ", OP_INSERT, len(op[1])))
+                    write(bytes(op[1]))
+        out.write(compressor.flush())
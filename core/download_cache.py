@@ -0,0 +1,120 @@
+"""
+Content addressed cache of downloaded livery zips.
+
+Zips are kept under a key made from their content (sha256 from the version
+file) or, without one, from the URL and the server's ETag/Last-Modified. A
+zip that is needed again, by another preset, a rollback or a repair, is
+copied from here instead of downloaded. The cache is capped in size and the
+least recently used zips are evicted first, lookups refresh a zip's mtime.
+
+Disabled until init() is called with a size above zero.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+
+CACHE_DIR = None
+MAX_BYTES = 0
+CACHE_SUFFIX = ".zip"
+_lock = threading.Lock()
+
+
+def init(cache_dir, max_bytes):
+    """Enable the cache in cache_dir, capped at max_bytes. 0 disables it."""
+    global CACHE_DIR, MAX_BYTES
+    MAX_BYTES = max(0, int(max_bytes or 0))
+    CACHE_DIR = cache_dir if MAX_BYTES else None
+    if CACHE_DIR:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        evict()
+
+
+def enabled():
+    return CACHE_DIR is not None
+
+
+def make_key(url, sha256=None, validator=None):
+    """
+    Cache key for a zip, None if it cannot be identified safely.
+    A sha256 is shared by every URL serving the same bytes, otherwise the key
+    needs the server validator so a changed file never matches an old entry.
+    """
+    if sha256:
+        return f"sha256-{sha256.lower()}"
+    if validator:
+        return "url-" + hashlib.sha256(f"{url}\n{validator}".encode("utf-8")).hexdigest()
+    return None
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, key + CACHE_SUFFIX)
+
+
+def lookup(key, destination):
+    """
+    Copy the cached zip for key to destination.
+    A hard link is used when the cache and destination share a drive.
+    Returns True on a hit.
+    """
+    if not enabled() or not key:
+        return False
+    path = _path(key)
+    with _lock:
+        if not os.path.exists(path):
+            return False
+        os.utime(path) # most recently used
+        if os.path.exists(destination):
+            os.remove(destination)
+        try:
+            os.link(path, destination)
+        except OSError:
+            shutil.copyfile(path, destination)
+    return True
+
+
+def store(key, zip_path):
+    """
+    Move a zip into the cache under key, then evict down to the size cap.
+    The zip is gone from zip_path afterwards either way.
+    """
+    if not enabled() or not key:
+        os.remove(zip_path)
+        return
+    path = _path(key)
+    with _lock:
+        if os.path.exists(path) and os.path.samefile(path, zip_path):
+            os.remove(zip_path) # hard link from lookup, the cached copy stays
+            os.utime(path)
+        else:
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            shutil.move(zip_path, temp_path)
+            os.replace(temp_path, path)
+    evict()
+
+
+def evict():
+    """Remove least recently used zips until the cache fits MAX_BYTES. Returns the bytes freed."""
+    if not enabled():
+        return 0
+    with _lock:
+        entries = []
+        total = 0
+        with os.scandir(CACHE_DIR) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(CACHE_SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+    return freed
@@ -0,0 +1,863 @@
+"""
+Shared HTTP client for every network call AERIS makes.
+
+- Keep-alive connections are pooled per (scheme, host, port) and reused
+- TLS sessions are cached per host so reconnects skip the full handshake
+- DNS lookups are cached for DNS_CACHE_TTL seconds
+- A per-host circuit breaker fails fast once a host keeps failing
+- call_with_retry() retries transient failures with backoff and jitter
+
+Errors match urllib.request: HTTPError for status >= 400, URLError for
+connection problems and ContentTooShortError for truncated downloads,
+so callers keep their existing except blocks.
+"""
+
+import hashlib
+import http.client
+import json
+import os
+import random
+import re
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+from urllib.error import HTTPError, URLError, ContentTooShortError
+
+USER_AGENT = "AERIS"
+DEFAULT_TIMEOUT = 30
+DNS_CACHE_TTL = 300
+MAX_IDLE_PER_HOST = 8
+MAX_REDIRECTS = 5
+DRAIN_LIMIT = 64 * 1024 # bodies smaller than this are read off so the connection can be reused
+CHUNK_SIZE = 1024 * 1024
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+BREAKER_FAILURES = 5    # consecutive failures before a host is cut off
+BREAKER_COOLDOWN = 30   # seconds before a cut off host gets another try
+
+_pool = {}              # (scheme, host, port) -> list of idle connections
+_pool_lock = threading.Lock()
+_dns_cache = {}         # (host, port) -> (expires_at, addrinfo list)
+_dns_lock = threading.Lock()
+_tls_sessions = {}      # host -> ssl.SSLSession
+_ssl_context = ssl.create_default_context()
+_breakers = {}          # (scheme, host, port) -> [consecutive failures, open until]
+_breaker_lock = threading.Lock()
+_bytes_received = 0     # response body bytes read since the process started
+_bytes_lock = threading.Lock()
+
+
+def resolve(host, port):
+    """Return getaddrinfo results for host:port, cached for DNS_CACHE_TTL seconds."""
+    key = (host, port)
+    now = time.monotonic()
+    with _dns_lock:
+        entry = _dns_cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+
+    infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    with _dns_lock:
+        _dns_cache[key] = (now + DNS_CACHE_TTL, infos)
+    return infos
+
+
+def _open_socket(host, port, timeout):
+    last_error = None
+    for family, socktype, proto, _, sockaddr in resolve(host, port):
+        sock = None
+        try:
+            sock = socket.socket(family, socktype, proto)
+            sock.settimeout(timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            last_error = e
+            if sock is not None:
+                sock.close()
+
+    # the cached address may be stale, look it up again next time
+    with _dns_lock:
+        _dns_cache.pop((host, port), None)
+    raise last_error or OSError(f"No addresses found for {host}:{port}")
+
+
+class _HTTPConnection(http.client.HTTPConnection):
+    def connect(self):
+        self.sock = _open_socket(self.host, self.port, self.timeout)
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+    def connect(self):
+        sock = _open_socket(self.host, self.port, self.timeout)
+        session = _tls_sessions.get(self.host)
+        try:
+            self.sock = self._context.wrap_socket(sock, server_hostname=self.host, session=session)
+        except ValueError:
+            # session no longer usable with this context, do a full handshake
+            _tls_sessions.pop(self.host, None)
+            self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+def _pool_key(url):
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        raise URLError(f"unknown url type: {scheme}")
+    if not parts.hostname:
+        raise URLError(f"no host given: {url}")
+    port = parts.port or (443 if scheme == "https" else 80)
+    return scheme, parts.hostname, port
+
+
+def _get_connection(key, timeout):
+    """Return (connection, reused) for key, taking an idle one from the pool if possible."""
+    with _pool_lock:
+        idle = _pool.get(key)
+        if idle:
+            conn = idle.pop()
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+
+    scheme, host, port = key
+    if scheme == "https":
+        return _HTTPSConnection(host, port, timeout=timeout, context=_ssl_context), False
+    return _HTTPConnection(host, port, timeout=timeout), False
+
+
+def _release_connection(key, conn):
+    """Put a connection with a fully read response back in the pool."""
+    if conn.sock is None:
+        return
+    if isinstance(conn.sock, ssl.SSLSocket) and conn.sock.session is not None:
+        # TLS 1.3 tickets arrive after the handshake, so grab the session now
+        _tls_sessions[key[1]] = conn.sock.session
+    with _pool_lock:
+        idle = _pool.setdefault(key, [])
+        if len(idle) < MAX_IDLE_PER_HOST:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+def close_all():
+    """Close every pooled connection. Called on program shutdown."""
+    with _pool_lock:
+        connections = [conn for idle in _pool.values() for conn in idle]
+        _pool.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+class Response:
+    """
+    File-like wrapper around an http.client response on a pooled connection.
+    Closing it returns the connection to the pool when the body was fully read.
+    Supports the parts of urllib's response we use: read, readline, iteration,
+    getcode, status, headers and the context manager.
+    """
+    def __init__(self, url, key, conn, resp):
+        self.url = url
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        self.status = resp.status
+        self.code = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+
+    def getcode(self):
+        return self.status
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def read(self, amt=None):
+        try:
+            data = self._resp.read(amt)
+        except (OSError, http.client.IncompleteRead) as e:
+            raise self._lost_connection(e)
+        _count_received(len(data))
+        return data
+
+    def readinto(self, buffer):
+        try:
+            read = self._resp.readinto(buffer)
+        except (OSError, http.client.IncompleteRead) as e:
+            raise self._lost_connection(e)
+        _count_received(read)
+        return read
+
+    def readline(self, limit=-1):
+        try:
+            line = self._resp.readline(limit)
+        except (OSError, http.client.IncompleteRead) as e:
+            raise self._lost_connection(e)
+        # http.client's readline returns b"" at a closed socket even when bytes are missing,
+        # read() raises IncompleteRead for the same thing
+        if not line and limit and self._resp.length:
+            raise self._lost_connection(http.client.IncompleteRead(b"", self._resp.length))
+        _count_received(len(line))
+        return line
+
+    def _lost_connection(self, error):
+        # a body cut off mid-read is a truncated download, not a local file problem
+        if isinstance(error, ContentTooShortError):
+            return error
+        return ContentTooShortError(f"connection lost while reading {self.url}: {error}", (None, self.headers))
+
+    def __iter__(self):
+        while line := self.readline():
+            yield line
+
+    def close(self):
+        if self._conn is None:
+            self._resp.close() # released already, or a proxied response that owns its connection
+            return
+        resp, conn = self._resp, self._conn
+        self._conn = None
+        try:
+            if not resp.isclosed() and resp.length is not None and resp.length <= DRAIN_LIMIT:
+                resp.read()
+        except (OSError, http.client.HTTPException):
+            pass
+
+        if resp.isclosed() and not resp.will_close:
+            _release_connection(self._key, conn)
+        else:
+            resp.close()
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _count_received(size):
+    global _bytes_received
+    with _bytes_lock:
+        _bytes_received += size
+
+
+def bytes_received():
+    """Response body bytes read from the network so far, the difference of two calls is what a task transferred."""
+    return _bytes_received
+
+
+def _uses_proxy(url):
+    scheme = urllib.parse.urlsplit(url).scheme.lower()
+    host = urllib.parse.urlsplit(url).hostname or ""
+    return scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(host)
+
+
+def _send(url, method, headers, timeout):
+    """Send one request and return a Response, retrying once if a reused connection went stale."""
+    key = _pool_key(url)
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    request_headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity"}
+    request_headers.update(headers or {})
+
+    while True:
+        conn, reused = _get_connection(key, timeout)
+        try:
+            conn.request(method, path, headers=request_headers)
+            resp = conn.getresponse()
+            return Response(url, key, conn, resp)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError, http.client.BadStatusLine) as e:
+            conn.close()
+            if reused:
+                continue # server dropped the idle keep-alive connection, use a fresh one
+            raise URLError(e)
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise URLError(e)
+
+
+class CircuitOpenError(URLError):
+    """The host failed too often lately, requests are refused without touching the network."""
+    pass
+
+
+def _breaker_check(key):
+    with _breaker_lock:
+        state = _breakers.get(key)
+        if state and state[1] > time.monotonic():
+            raise CircuitOpenError(f"{key[1]} failed {state[0]} times in a row, paused for {state[1] - time.monotonic():.0f}s")
+
+
+def record_failure(url):
+    """Count a failure against the host of url, BREAKER_FAILURES in a row open its circuit."""
+    key = _pool_key(url)
+    with _breaker_lock:
+        state = _breakers.setdefault(key, [0, 0])
+        state[0] += 1
+        if state[0] >= BREAKER_FAILURES:
+            # half open after the cooldown, the next failure opens it again
+            state[1] = time.monotonic() + BREAKER_COOLDOWN
+
+
+def record_success(url):
+    """A request to the host of url worked, close its circuit."""
+    with _breaker_lock:
+        _breakers.pop(_pool_key(url), None)
+
+
+def urlopen(url, method="GET", headers=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Open url and return a Response, following redirects.
+    Raises HTTPError for status >= 400 and URLError for connection errors,
+    CircuitOpenError (a URLError) if the host's circuit breaker is open.
+    """
+    if _uses_proxy(url):
+        request = urllib.request.Request(url, method=method, headers=headers or {})
+        response = urllib.request.urlopen(request, timeout=timeout)
+        return Response(response.geturl(), None, None, response)
+
+    for _ in range(MAX_REDIRECTS + 1):
+        _breaker_check(_pool_key(url))
+        try:
+            response = _send(url, method, headers, timeout)
+        except URLError:
+            record_failure(url)
+            raise
+        if response.status >= 500:
+            record_failure(url)
+        else:
+            record_success(url)
+        if response.status in REDIRECT_CODES and response.headers.get("Location"):
+            location = urllib.parse.urljoin(url, response.headers["Location"])
+            response.close()
+            if response.status == 303 and method != "HEAD":
+                method = "GET"
+            url = location
+            continue
+        if response.status >= 400:
+            response.close()
+            raise HTTPError(url, response.status, response.reason, response.headers, None)
+        return response
+
+    raise HTTPError(url, response.status, "Too many redirects", response.headers, None)
+
+
+class RetryPolicy:
+    """
+    How often and how patiently call_with_retry() tries again.
+    - attempts : total tries, 1 disables retrying
+    - backoff : delay before the first retry in seconds, doubled every retry
+    - max_backoff : upper bound for a single delay
+    - retry_statuses : HTTP codes worth retrying, other HTTP errors fail right away
+    - timeout : socket timeout for each request
+    Delays use full jitter, a random time between 0 and the backoff, so parallel
+    downloads that failed together do not all come back at the same moment.
+    """
+    def __init__(self, attempts=4, backoff=1.0, max_backoff=30.0, retry_statuses=(408, 425, 429, 500, 502, 503, 504), timeout=DEFAULT_TIMEOUT):
+        self.attempts = max(1, int(attempts))
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self.retry_statuses = tuple(retry_statuses)
+        self.timeout = timeout
+
+    def is_retryable(self, error):
+        if isinstance(error, (CircuitOpenError, RangesUnsupported)):
+            return False
+        if isinstance(error, HTTPError):
+            return error.code in self.retry_statuses
+        # local file errors (disk full, permissions) are plain OSErrors and not worth retrying
+        return isinstance(error, (URLError, ConnectionError, TimeoutError, http.client.HTTPException))
+
+    def delay(self, retry, error=None):
+        """Seconds to wait before retry number retry (1 based), honours a numeric Retry-After."""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (retry - 1)))
+        retry_after = getattr(error, "headers", None) and error.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(self.max_backoff, int(retry_after)))
+        return delay
+
+
+def call_with_retry(func, policy, url=None, on_retry=None):
+    """
+    Call func() until it returns or policy runs out of attempts, then raise the last error.
+    Transfers that broke off midway count against url's circuit breaker.
+    on_retry(retry, attempts, error, delay) is called before each wait.
+    """
+    for attempt in range(1, policy.attempts + 1):
+        try:
+            return func()
+        except Exception as e:
+            if url and isinstance(e, ContentTooShortError):
+                record_failure(url)
+            if attempt == policy.attempts or not policy.is_retryable(e):
+                raise
+            delay = policy.delay(attempt, e)
+            if on_retry:
+                on_retry(attempt, policy.attempts - 1, e, delay)
+            time.sleep(delay)
+
+
+def head(url, headers=None, timeout=DEFAULT_TIMEOUT):
+    """Send a HEAD request and return the response headers."""
+    with urlopen(url, method="HEAD", headers=headers, timeout=timeout) as response:
+        return response.headers
+
+
+def urlretrieve(url, filename, reporthook=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Download url to filename, same contract as urllib.request.urlretrieve.
+    reporthook(block_number, block_size, total_size) is called per chunk.
+    Raises ContentTooShortError if fewer bytes arrive than Content-Length promised.
+    """
+    with urlopen(url, timeout=timeout) as response:
+        headers = response.headers
+        total = int(headers.get("Content-Length", -1))
+        read = 0
+        block = 0
+        if reporthook:
+            reporthook(block, CHUNK_SIZE, total)
+        with open(filename, "wb") as f:
+            try:
+                while chunk := response.read(CHUNK_SIZE):
+                    f.write(chunk)
+                    read += len(chunk)
+                    block += 1
+                    if reporthook:
+                        reporthook(block, CHUNK_SIZE, total)
+            except http.client.IncompleteRead as e:
+                f.write(e.partial)
+                read += len(e.partial)
+
+    if total >= 0 and read < total:
+        raise ContentTooShortError(
+            f"retrieval incomplete: got only {read} out of {total} bytes",
+            (filename, headers)
+        )
+    return filename, headers
+
+
+PART_SUFFIX = ".part"
+PART_META_SUFFIX = ".part.json"
+SEGMENT_RETRIES = 3
+SEGMENT_RETRY_DELAY = 1 # seconds, doubled after every failed attempt
+
+
+def parse_content_range(value):
+    """Parse 'bytes 100-199/1000' into (100, 199, 1000). Total is None for '*'."""
+    match = re.match(r"bytes\s+(\d+)-(\d+)/(\d+|\*)", value or "")
+    if not match:
+        return None
+    start, end, total = match.groups()
+    return int(start), int(end), None if total == "*" else int(total)
+
+
+def _load_part_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_part_meta(meta_path, url, headers):
+    meta = {
+        "url": url,
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "length": None,
+    }
+    content_range = parse_content_range(headers.get("Content-Range"))
+    if content_range:
+        meta["length"] = content_range[2]
+    elif headers.get("Content-Length"):
+        meta["length"] = int(headers["Content-Length"])
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def _discard_part(part_path, meta_path):
+    for path in (part_path, meta_path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def download_file(url, filename, reporthook=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Resumable download of url to filename.
+
+    Bytes land in '<filename>.part' with the server validators (ETag, Last-Modified,
+    length) saved next to it in '<filename>.part.json'. If a previous attempt left a
+    part file behind, only the missing range is requested, guarded by If-Range so a
+    changed file on the server restarts from zero instead of mixing versions.
+    Servers without range support or validators fall back to a full download.
+
+    The part file is renamed to filename once every byte has arrived.
+    A dropped connection keeps the part file and raises ContentTooShortError.
+    reporthook(bytes_done, total_bytes) is called after each chunk.
+    """
+    part_path = filename + PART_SUFFIX
+    meta_path = filename + PART_META_SUFFIX
+
+    offset = 0
+    meta = _load_part_meta(meta_path)
+    headers = {}
+    # a segmented part file is preallocated, its size says nothing about what arrived
+    if os.path.exists(part_path) and meta and meta.get("url") == url and "segments" not in meta:
+        validator = meta.get("etag") or meta.get("last_modified")
+        offset = os.path.getsize(part_path)
+        if validator and offset:
+            if meta.get("length") is not None and offset >= meta["length"]:
+                os.replace(part_path, filename)
+                _discard_part(part_path, meta_path)
+                return filename, None
+            headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+        else:
+            offset = 0
+    if not headers:
+        _discard_part(part_path, meta_path)
+
+    try:
+        response = urlopen(url, headers=headers, timeout=timeout)
+    except HTTPError as e:
+        if e.code != 416 or not headers:
+            raise
+        # our part file does not fit the remote file anymore, start again from zero
+        _discard_part(part_path, meta_path)
+        return download_file(url, filename, reporthook, timeout)
+
+    content_range = parse_content_range(response.headers.get("Content-Range"))
+    if response.status == 206 and (not headers or not content_range or content_range[0] != offset):
+        # a range other than the one asked for, its bytes cannot go into the part file
+        response.close()
+        _discard_part(part_path, meta_path)
+        if not headers:
+            raise URLError(f"'{url}' answered a plain request with a partial body")
+        return download_file(url, filename, reporthook, timeout)
+
+    with response:
+        if response.status == 206:
+            mode = "ab"
+        else:
+            # server sent the whole file, the part file is stale
+            offset = 0
+            mode = "wb"
+            meta = _save_part_meta(meta_path, url, response.headers)
+
+        total = meta.get("length") if meta else None
+        done = offset
+        with open(part_path, mode) as f:
+            while True:
+                try:
+                    chunk = response.read(CHUNK_SIZE)
+                except ContentTooShortError as e: # Response.read reports a lost connection this way
+                    raise ContentTooShortError(
+                        f"retrieval interrupted after {done} bytes, will resume next time: {e}",
+                        (part_path, response.headers)
+                    )
+                if not chunk:
+                    break
+                f.write(chunk)
+                done += len(chunk)
+                if reporthook:
+                    reporthook(done, total)
+
+    if total is not None and done < total:
+        raise ContentTooShortError(
+            f"retrieval incomplete: got only {done} out of {total} bytes",
+            (part_path, response.headers)
+        )
+
+    os.replace(part_path, filename)
+    _discard_part(part_path, meta_path)
+    return filename, response.headers
+
+
+class RangesUnsupported(Exception):
+    """The server cannot serve this file in byte ranges, use download_file instead."""
+    pass
+
+
+def download_segmented(url, filename, segments=4, progress=None, timeout=DEFAULT_TIMEOUT, connections=None):
+    """
+    Download url to filename as several byte ranges fetched at the same time.
+
+    '<filename>.part' is preallocated to the full length and every segment writes
+    its own region in place through its own file handle, so nothing is stitched
+    afterwards. Progress of each segment is kept in '<filename>.part.json', an
+    interrupted download resumes each segment where it stopped as long as the
+    server validator (ETag or Last-Modified) still matches.
+
+    A failing segment is retried SEGMENT_RETRIES times from where it stopped,
+    without touching the other segments. If a segment still fails, the error is
+    raised once all segments have stopped and the part file is kept for next time.
+
+    connections caps how many segments are fetched at once (default: all of them),
+    the others wait for a free connection.
+
+    progress(bytes_done, total_bytes, segments_done, segments) is called from the
+    segment threads as data arrives.
+    Raises RangesUnsupported if the server gives no length, validator or range support.
+    """
+    part_path = filename + PART_SUFFIX
+    meta_path = filename + PART_META_SUFFIX
+
+    headers = head(url, timeout=timeout)
+    length = headers.get("Content-Length")
+    validator = headers.get("ETag") or headers.get("Last-Modified")
+    if headers.get("Accept-Ranges", "").lower() != "bytes" or not length or not validator:
+        raise RangesUnsupported(f"'{url}' does not support range requests")
+    length = int(length)
+
+    meta = _load_part_meta(meta_path)
+    if (not meta or meta.get("url") != url or meta.get("length") != length or "segments" not in meta
+            or (meta.get("etag") or meta.get("last_modified")) != validator or not os.path.exists(part_path)):
+        _discard_part(part_path, meta_path)
+        segment_size = -(-length // max(1, segments))
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "length": length,
+            # [start, end inclusive, bytes done]
+            "segments": [[start, min(start + segment_size, length) - 1, 0] for start in range(0, length, segment_size)],
+        }
+        with open(part_path, "wb") as f:
+            f.truncate(length)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    state = meta["segments"]
+    lock = threading.Lock()
+    errors = []
+
+    def report():
+        if progress:
+            done = sum(segment[2] for segment in state)
+            finished = sum(1 for start, end, got in state if got >= end - start + 1)
+            progress(done, length, finished, len(state))
+
+    def save_meta():
+        with lock:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+    def fetch_segment(segment):
+        start, end, _ = segment
+        delay = SEGMENT_RETRY_DELAY
+        for attempt in range(SEGMENT_RETRIES + 1):
+            if segment[2] >= end - start + 1:
+                break
+            try:
+                _fetch_range(url, part_path, segment, validator, timeout, report)
+                break
+            except HTTPError as e:
+                if e.code < 500 or attempt == SEGMENT_RETRIES:
+                    errors.append(e)
+                    break
+            except (OSError, http.client.HTTPException) as e:
+                if attempt == SEGMENT_RETRIES:
+                    errors.append(e)
+                    break
+            except Exception as e:
+                errors.append(e)
+                break
+            time.sleep(delay)
+            delay *= 2
+        save_meta()
+
+    pending = iter(state)
+    pending_lock = threading.Lock()
+
+    def fetch_pending():
+        while True:
+            with pending_lock:
+                segment = next(pending, None)
+            if segment is None:
+                return
+            fetch_segment(segment)
+
+    report()
+    threads = [threading.Thread(target=fetch_pending, name=f"segment-{i}", daemon=True)
+               for i in range(max(1, min(connections or len(state), len(state))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        for e in errors:
+            if isinstance(e, RangesUnsupported):
+                _discard_part(part_path, meta_path)
+                raise e
+        raise errors[0]
+
+    os.replace(part_path, filename)
+    _discard_part(part_path, meta_path)
+    return filename, headers
+
+
+def open_range(url, start, end, validator=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Open bytes start to end (inclusive) of url, guarded by If-Range when a validator is given.
+    Raises RangesUnsupported if the server answers with anything but that range.
+    """
+    headers = {"Range": f"bytes={start}-{end}"}
+    if validator:
+        headers["If-Range"] = validator
+    response = urlopen(url, headers=headers, timeout=timeout)
+    content_range = parse_content_range(response.headers.get("Content-Range"))
+    if response.status != 206 or not content_range or content_range[0] != start:
+        response.close()
+        raise RangesUnsupported(f"'{url}' answered a range request with status {response.status}")
+    return response
+
+
+def _fetch_range(url, part_path, segment, validator, timeout, report):
+    """Fetch the rest of one segment into its region of part_path, segment[2] counts the bytes written."""
+    start, end, _ = segment
+    offset = start + segment[2]
+    with urlopen(url, headers={"Range": f"bytes={offset}-{end}", "If-Range": validator}, timeout=timeout) as response:
+        content_range = parse_content_range(response.headers.get("Content-Range"))
+        if response.status != 206 or not content_range or content_range[0] != offset:
+            # the file changed on the server (If-Range failed) or ranges are ignored
+            raise RangesUnsupported(f"'{url}' answered a range request with status {response.status}")
+        with open(part_path, "r+b") as f:
+            f.seek(offset)
+            while chunk := response.read(min(CHUNK_SIZE, end - start + 1 - segment[2])):
+                f.write(chunk)
+                segment[2] += len(chunk)
+                report()
+    if segment[2] < end - start + 1:
+        raise ContentTooShortError(f"segment {start}-{end} ended after {segment[2]} bytes", (part_path, None))
+
+
+class CachedStream:
+    """
+    Body of a URL opened through open_cached(), read it like a response.
+    - from_cache : True if the server answered 304 and the cached copy is read
+    - changed : opposite of from_cache
+    A fresh body is copied into the cache while it is read, the copy is only
+    kept if the body was read to the end. Stopping early (eg. once the needed
+    part of a version file was parsed) leaves the previous cache entry alone.
+    """
+    def __init__(self, url, body_path, meta_path, response=None):
+        self.url = url
+        self.body_path = body_path
+        self._meta_path = meta_path
+        self._response = response
+        self.from_cache = response is None
+        self.changed = not self.from_cache
+        self._complete = False
+        if self.from_cache:
+            self._source = open(body_path, "rb")
+            self._copy = None
+        else:
+            self._source = response
+            self._temp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            self._copy = open(self._temp_path, "wb")
+
+    def _track(self, data):
+        if not data:
+            self._complete = True
+        elif self._copy is not None:
+            self._copy.write(data)
+        return data
+
+    def read(self, amt=CHUNK_SIZE):
+        return self._track(self._source.read(amt))
+
+    def readline(self):
+        return self._track(self._source.readline())
+
+    def __iter__(self):
+        while line := self.readline():
+            yield line
+
+    def close(self):
+        if self._source is None:
+            return
+        self._source.close()
+        self._source = None
+        if self._copy is None:
+            return
+        self._copy.close()
+        if not self._complete:
+            os.remove(self._temp_path)
+            return
+        os.replace(self._temp_path, self.body_path)
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "url": self.url,
+                "etag": self._response.headers.get("ETag"),
+                "last_modified": self._response.headers.get("Last-Modified"),
+            }, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_cached(url, cache_dir, timeout=DEFAULT_TIMEOUT):
+    """
+    Open url through an on-disk cache in cache_dir and return a CachedStream.
+
+    A cached copy is revalidated with If-None-Match / If-Modified-Since, so an
+    unchanged file costs a 304 and is then read from disk instead of the network.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    body_path = os.path.join(cache_dir, f"{key}.body")
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+
+    headers = {}
+    meta = _load_part_meta(meta_path)
+    if meta and meta.get("url") == url and os.path.exists(body_path):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = urlopen(url, headers=headers, timeout=timeout)
+    except HTTPError as e:
+        # urllib's opener, used behind a proxy, raises for a 304 instead of returning it
+        if e.code != 304 or not headers:
+            raise
+        e.close()
+        return CachedStream(url, body_path, meta_path)
+    if response.status == 304 and headers:
+        response.close()
+        return CachedStream(url, body_path, meta_path)
+    return CachedStream(url, body_path, meta_path, response)
+
+
+def fetch_cached(url, cache_dir, timeout=DEFAULT_TIMEOUT):
+    """
+    GET url through the on-disk cache in cache_dir, see open_cached.
+    Returns (body_path, changed), changed is False when the cached body was reused.
+    """
+    with open_cached(url, cache_dir, timeout) as stream:
+        if stream.from_cache:
+            return stream.body_path, False
+        while stream.read(CHUNK_SIZE):
+            pass
+    return stream.body_path, True
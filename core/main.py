@@ -2,26 +2,48 @@ from collections import defaultdict
 import json
 import os
 import sys
-import urllib.request
+import urllib.parse
 import shutil
 import logging
 from logging.handlers import RotatingFileHandler
 import inspect
 import time
 import zipfile
+import stat
+import hashlib
+import zlib
 import atexit
 from urllib.error import HTTPError, URLError, ContentTooShortError
 import traceback
 from core import manifest_db as manifest
+from core import http_client
+from core import ziptools
+from core import download_cache
+from core import delta
 import yaml
 from collections import OrderedDict
 import re
+import threading
+import queue
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 software_version = "1.1.0"
 current_aircraft_id = None 
 title = "86th vFW: AERIS"
 first_time = False
+DEFAULT_CONCURRENT_DOWNLOADS = 4
+DEFAULT_EXTRACT_QUEUE_DEPTH = 2
+DEFAULT_SEGMENT_THRESHOLD_MB = 256
+PARTIAL_UPDATE_MAX_RATIO = 0.5 # above this share of changed bytes a partial update downloads the whole zip
+DEFAULT_DOWNLOAD_SEGMENTS = 4
+FILE_INFO_KEYS = ("size", "unpacked_size", "sha256", "crc32", "zip") # optional key=value fields after the file name in version files
+FILE_INFO_INT_KEYS = ("size", "unpacked_size")
+FILE_INFO_HEX_KEYS = ("sha256", "crc32")
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+MAX_EXTRACT_WORKERS = 8
+DELETE_WORKERS = 8
 ## FOR DOCUMENTATION: Program *must* be in a writable folder to function, so not program files.
 
 def generate_example_preset(path):
@@ -47,7 +69,18 @@ def generate_config_boilerplate(path):
         "program": {
             "server_url": None,
             "version_filename": "version.txt",
-            "server_version_file": "server_version.txt"
+            "server_version_file": "server_version.txt",
+            "max_concurrent_downloads": DEFAULT_CONCURRENT_DOWNLOADS,
+            "extract_queue_depth": DEFAULT_EXTRACT_QUEUE_DEPTH,
+            "streaming_extract": False,
+            "segment_threshold_mb": DEFAULT_SEGMENT_THRESHOLD_MB,
+            "download_segments": DEFAULT_DOWNLOAD_SEGMENTS,
+            "download_attempts": 4,
+            "network_timeout": http_client.DEFAULT_TIMEOUT,
+            "download_cache_mb": 0,
+            "partial_updates": True,
+            "extract_workers": 0,
+            "verify_full": False
         },
         "logging": {
             "log_file_name": "liveries.log",
@@ -197,6 +230,10 @@ def load_config():
             log_error("liveries_folder missing; user must confirm in config editor")
             return False
         log_info(f"liveries_folder = '{liveries_folder}'",tag="SET CONFIG")
+
+        download_cache_mb = _number_value(config["program"].get("download_cache_mb") or 0, "download_cache_mb") or 0 # invalid turns the cache off
+        download_cache.init(os.path.join(base_dir, "download_cache"), download_cache_mb * 1024 * 1024)
+        log_info(f"download_cache_mb={download_cache_mb}",tag="SET CONFIG")
         
         #Aircrafts
         aircrafts = get_aircraft_preset_list()
@@ -287,24 +324,90 @@ def get_local_version_file(aircraft_id):
         return None
 
 
-# Grab the URL to the remote location a livery exists
-def get_remote_livery_url(aircraft_id):
-    remote_subfolder = aircrafts[aircraft_id].get("remote_subfolder",None)
-    if remote_subfolder:
-        if remote_subfolder.startswith(("http://", "https://")):
-            # already a full URL, treat as absolute, ensure a trailing slash
-            return remote_subfolder.rstrip("/") + "/"
-        else:
-            # return relative path, appended to server_url
-            # return f"{server_url}/{remote_subfolder.lstrip("/").rstrip("/")}/"
-            log_error(f"Server URL is invalid")
-            raise ValueError(f"Server URL is invalid")
-    else:
-        # No subfolder given, return root server_url
-        # return f"{server_url}/"
+def parse_mirror_list(remote_subfolder):
+    """
+    Split a remote_subfolder value into its mirror URLs, in the order given.
+    Accepts a single URL, a comma separated string or a list.
+    """
+    if not remote_subfolder:
+        return []
+    if isinstance(remote_subfolder, str):
+        remote_subfolder = remote_subfolder.split(",")
+    return [str(url).strip() for url in remote_subfolder if str(url).strip()]
+
+
+def get_mirrors(aircraft_id):
+    """Every mirror of a preset as a base URL with a trailing slash, in the configured order."""
+    mirrors = parse_mirror_list(aircrafts[aircraft_id].get("remote_subfolder", None))
+    if not mirrors:
         log_error(f"Server URL is invalid")
         raise ValueError(f"Server URL is invalid")
-    
+    for mirror in mirrors:
+        if not mirror.startswith(("http://", "https://")):
+            log_error(f"Server URL is invalid")
+            raise ValueError(f"Server URL is invalid")
+    # already full URLs, treat as absolute, ensure a trailing slash
+    return [mirror.rstrip("/") + "/" for mirror in mirrors]
+
+
+MIRROR_PROBE_TTL = 300 # seconds a mirror ranking is trusted before probing again
+_mirror_rankings = {} # aircraft_id -> (probed_at, mirrors fastest first)
+_mirror_lock = threading.Lock()
+
+def rank_mirrors(aircraft_id):
+    """
+    The mirrors of a preset, fastest healthy one first.
+    Each mirror's version file gets a HEAD request, in parallel, and healthy mirrors are
+    ordered by how long it took. Mirrors that failed go last in their configured order.
+    Rankings are kept for MIRROR_PROBE_TTL seconds, a single mirror is never probed.
+    """
+    mirrors = get_mirrors(aircraft_id)
+    if len(mirrors) == 1:
+        return mirrors
+    with _mirror_lock:
+        ranking = _mirror_rankings.get(aircraft_id)
+        if ranking and time.monotonic() - ranking[0] < MIRROR_PROBE_TTL and sorted(ranking[1]) == sorted(mirrors):
+            return list(ranking[1])
+
+    version_file = f"{aircraft_id}_{version_filename}"
+    with ThreadPoolExecutor(max_workers=len(mirrors), thread_name_prefix="probe") as pool:
+        latencies = list(pool.map(lambda mirror: _probe_mirror(mirror + version_file), mirrors))
+
+    healthy = sorted((latency, index) for index, latency in enumerate(latencies) if latency is not None)
+    ranked = [mirrors[index] for _, index in healthy]
+    ranked += [mirror for mirror, latency in zip(mirrors, latencies) if latency is None]
+    log_info(f"Mirror ranking for {aircraft_id}: {list(zip(mirrors, latencies))} -> {ranked}", tag="MIRRORS")
+    with _mirror_lock:
+        _mirror_rankings[aircraft_id] = (time.monotonic(), ranked)
+    return ranked
+
+
+def _probe_mirror(url):
+    """Seconds a HEAD request for url took, None if it failed."""
+    start_time = time.monotonic()
+    try:
+        http_client.head(url, timeout=5)
+        return time.monotonic() - start_time
+    except Exception as e:
+        log_warn(f"Mirror probe of '{url}' failed: {e}", tag="MIRRORS")
+        return None
+
+
+def demote_mirror(aircraft_id, mirror):
+    """Move a mirror that just failed to the end of the ranking, later files start elsewhere."""
+    with _mirror_lock:
+        ranking = _mirror_rankings.get(aircraft_id)
+        if ranking and mirror in ranking[1] and ranking[1][-1] != mirror:
+            mirrors = [m for m in ranking[1] if m != mirror] + [mirror]
+            _mirror_rankings[aircraft_id] = (ranking[0], mirrors)
+            log_warn(f"Demoted mirror '{mirror}' for {aircraft_id}", tag="MIRRORS")
+
+
+# Grab the URL to the remote location a livery exists, the best mirror when there are several
+def get_remote_livery_url(aircraft_id):
+    return rank_mirrors(aircraft_id)[0]
+
+
 
 # Same as local version, grabs the correct URL and file name for each aircraft type
 def get_server_version_file(aircraft_id):
@@ -334,9 +437,64 @@ assert is_newer("release-5.0.9", "release-5.1.0")  # True
 assert not is_newer("release-5.1.1", "release-5.1.0")  # False
 
 
-def parse_server_file(filename, local_version, server_version):
+def parse_action_line(line):
+    """
+    Split a version file line 'action;filename.zip;key=value;...;optional message'.
+    Fields named in FILE_INFO_KEYS are collected into info, sizes as ints,
+    checksums as lowercase hex and names as written. Everything else is part of the message.
+    Returns (action, file_or_folder, info, message)
+    """
+    parts = [part.strip() for part in line.split(";")]
+    action = parts[0].lower()
+    file_or_folder = parts[1] if len(parts) > 1 else ""
+    info = {}
+    message = []
+    for part in parts[2:]:
+        key, sep, value = part.partition("=")
+        key = key.strip().lower()
+        if sep and key in FILE_INFO_KEYS and value.strip():
+            value = value.strip()
+            if key in FILE_INFO_INT_KEYS:
+                try:
+                    info[key] = int(value)
+                except ValueError:
+                    log_warn(f"Ignoring invalid {key} '{value}' for '{file_or_folder}'", tag="PARSE_REMOTE_FILE")
+            elif key in FILE_INFO_HEX_KEYS:
+                info[key] = value.lower()
+            else:
+                info[key] = value
+        else:
+            message.append(part)
+    return action, file_or_folder, info, ";".join(message)
+
+
+def parse_server_file(filename, local_version, server_version, lines=None, file_info=None):
+    """
+    Collect the files to download and folders to delete between local_version and server_version.
+    Reads the version file at filename, unless its lines are passed as lines,
+    any iterable works (a list, an open file, a response streaming bytes).
+
+    Releases are listed newest first, so reading stops at the first release at
+    or below local_version. Only releases newer than local are ever held in memory.
+
+    A release can reference a snapshot file with "snapshot;<file>", listing every
+    file installed as of that release. Fresh installs, and installs older than the
+    oldest release left in the history, start from the newest snapshot and only
+    replay the releases after it. Without a usable snapshot the history is replayed.
+
+    Pass a dict as file_info to receive the size/checksum fields of each file to
+    download, {filename: {"size": ..., "sha256": ..., "crc32": ...}}, taken from
+    the newest line that lists the file. Files without fields are left out.
+
+    "patch;<patch file>;zip=<zip>" updates files extracted from <zip> with a binary
+    delta (see core/delta.py). The zip is returned as a download and its file_info
+    gets "patches", the patch files to try in release order, oldest first. A zip that
+    is downloaded in full anyway, or that is deleted, drops its patches. Without
+    file_info patches cannot be passed on and the zip is simply downloaded.
+    Returns (download_files, delete_folders)
+    """
     short_filename = os.path.basename(filename)
-    log_info(f"Running...", include_args=True)
+    log_info(f"Running...", include_args=False)
     download_files = set() #set avoids dupes
     delete_folders = set()
     releases_to_process = [] # how many releases between local and current
@@ -348,20 +506,36 @@ def parse_server_file(filename, local_version, server_version):
 
     server_tuple = parse_release(server_version)
 
-    # Step 1: Read all the lines, build blocks for each release
-    # looks like a json list, release then all of the lines in it after
-    with open(filename, "r", encoding="utf-8") as f: 
-        lines = [line.strip() for line in f if line.strip()]
+    if lines is None:
+        with open(filename, "r", encoding="utf-8") as f: 
+            return parse_server_file(filename, local_version, server_version, lines=f, file_info=file_info)
 
+    # Step 1: Read lines up to the local release, build blocks for each newer release
+    # looks like a json list, release then all of the lines in it after
     current_release = None
     release_blocks = defaultdict(list) # release string -> list of action lines, this is the JSON looking part
+    snapshots = {} # release string -> snapshot file name
+    reached_local = False
     for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.strip()
+        if not line:
+            continue
         line_lower = line.lower()
         if line_lower.startswith("release-"):
+            if local_tuple is not None and parse_release(line) <= local_tuple:
+                # everything from here on is already installed
+                log_info(f"Reached {line}, stopped reading at local {local_version}", tag="PARSE_REMOTE_FILE")
+                reached_local = True
+                break
             current_release = line
-            log_info(f"Found {current_release}", tag="PARSE_REMOTE_FILE", include_args=True)
+            log_info(f"Found {current_release}", tag="PARSE_REMOTE_FILE")
             continue
         if current_release:
+            if line_lower.startswith("snapshot;"):
+                snapshots[current_release] = line.split(";", 2)[1].strip()
+                continue
             release_blocks[current_release].append(line) # if not a release title, then its a line in the release, add it.
 
     # Step 2: Check which releases are newer then the local, up to the servers current version
@@ -372,29 +546,102 @@ def parse_server_file(filename, local_version, server_version):
             log_info(f"{release} found in release_blocks, and added to list of releases", include_args=True)
         
 
-    # Step 3: Reverse the list, so we don't download deleted files, but do download them if they are re-added
+    # Step 3: Start from a snapshot when there is no usable history below the releases to install
+    history_pruned = local_tuple is not None and not reached_local
+    if local_tuple is None or history_pruned:
+        for index, release in enumerate(releases_to_process):
+            if release not in snapshots:
+                continue
+            snapshot_files = load_snapshot(filename, snapshots[release])
+            if snapshot_files is None:
+                continue
+            log_info(f"Using snapshot '{snapshots[release]}' of {release}, replaying {index} newer release(s)", tag="PARSE_REMOTE_FILE")
+            download_files.update(snapshot_files)
+            if file_info is not None:
+                file_info.update({name: info for name, info in snapshot_files.items() if info})
+            releases_to_process = releases_to_process[:index]
+            break
+        else:
+            if history_pruned:
+                log_warn(f"History in '{short_filename}' does not reach {local_version} and has no snapshot, replaying what is left", tag="PARSE_REMOTE_FILE")
+
+    # Step 4: Reverse the list, so we don't download deleted files, but do download them if they are re-added
     releases_to_process.reverse()
 
-    # Step 4: Process releases in order
+    # Step 5: Process releases in order
+    patches = defaultdict(list) # zip -> patch files, oldest first
     for release in releases_to_process:
         for line in release_blocks[release]:
             if ";" not in line:
                 continue
-            action, file_or_folder = line.split(";",2)[:2]
-            action = action.lower().strip()
-            file_or_folder = file_or_folder.strip()
+            action, file_or_folder, info, _ = parse_action_line(line)
             if action in ["new", "update"]:
                 download_files.add(file_or_folder)
                 delete_folders.discard(file_or_folder)   # no longer scheduled for deletion
+                patches.pop(file_or_folder, None) # the server's zip already has every change
+                if file_info is not None:
+                    if info:
+                        file_info[file_or_folder] = info
+                    else:
+                        file_info.pop(file_or_folder, None) # an older line's fields no longer apply
                 log_info(f"Found '{action}' '{file_or_folder}'")
             elif action == "delete":
                 delete_folders.add(file_or_folder)
                 download_files.discard(file_or_folder) # remove previously added files
+                patches.pop(file_or_folder, None)
+                if file_info is not None:
+                    file_info.pop(file_or_folder, None)
                 log_info(f"Found '{action}' '{file_or_folder}'")
+            elif action == "patch":
+                target = info.get("zip")
+                if not target:
+                    log_warn(f"Ignoring patch '{file_or_folder}' without a zip= field", tag="PARSE_REMOTE_FILE")
+                    continue
+                delete_folders.discard(target)
+                patches[target].append(file_or_folder)
+                if file_info is not None and target in download_files:
+                    file_info.pop(target, None) # the zip changed since the line that listed its fields
+                log_info(f"Found '{action}' '{file_or_folder}' for '{target}'")
+
+    # Step 6: Zips only changed by patches are patched, falling back to the full zip
+    for target, patch_files in patches.items():
+        if target in download_files:
+            continue
+        download_files.add(target)
+        if file_info is not None:
+            file_info[target] = {"patches": patch_files}
 
     return list (download_files), list(delete_folders)
 
 
+def load_snapshot(version_file, snapshot_name):
+    """
+    Read a snapshot file, one file name per line, blank lines and # comments ignored.
+    A name can be followed by the same ;key=value fields as version file lines.
+    snapshot_name is relative to the version file, a URL or a local path.
+    Returns {filename: info}, None if the snapshot could not be read.
+    """
+    try:
+        if version_file.startswith(("http://", "https://")):
+            path, _ = fetch_remote_version_file(urllib.parse.urljoin(version_file, snapshot_name))
+        else:
+            path = os.path.join(os.path.dirname(version_file), snapshot_name)
+        with open(path, "r", encoding="utf-8") as f:
+            files = {}
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                # reuse the action line parser, the name takes the place of the action
+                _, name, info, _ = parse_action_line(f"snapshot;{line}")
+                files[name] = info
+        log_info(f"Loaded snapshot '{snapshot_name}' with {len(files)} files", tag="SNAPSHOT")
+        return files
+    except Exception as e:
+        log_warn(f"Failed to load snapshot '{snapshot_name}': {e}", tag="SNAPSHOT")
+        return None
+
+
 def get_latest_release(filename):
     try:
         with open(filename, "r", encoding="utf-8") as f:
@@ -408,21 +655,108 @@ def get_latest_release(filename):
         return None
 
 
+def fetch_remote_version_file(url):
+    """
+    Fetch a remote version file through the on-disk HTTP cache.
+    Unchanged files are revalidated with a conditional GET and cost a 304.
+    Returns (path to the cached copy, changed since the last fetch).
+    """
+    return http_client.fetch_cached(url, http_cache_dir)
+
+
+_remote_version_memo = {} # url -> newest release parsed from the cached version file
+
 def get_remote_version(url):
     try:
-        with urllib.request.urlopen(url) as response:
-            for line in response:
-                line = line.decode('utf-8').strip()
-                if line.lower().startswith("release-"):
-                    return line
+        path, changed = fetch_remote_version_file(url)
+        if changed or url not in _remote_version_memo:
+            _remote_version_memo[url] = get_latest_release(path)
+        else:
+            log_info(f"Remote version file unchanged, using cached {_remote_version_memo[url]}", tag="HTTP_CACHE")
+        return _remote_version_memo[url]
     except Exception as e:
         log_error(f"Failed to get remote version: {e}", include_args=True)
         return None
 
 
-def get_remote_updates(aircraft_id):
-    local_newest = get_latest_release(get_local_version_file(aircraft_id))
-    server_newest = get_remote_version(get_server_version_file(aircraft_id))
+class UpdateSession:
+    """
+    The remote version file for one update flow, fetched once and kept in memory.
+    Pass it to get_aircraft_info, get_remote_updates and clean_up_operation
+    so none of them go back to the server for the same file.
+    - aircraft_id
+    - url : remote version file URL
+    - local_version : newest local release, None if never installed
+    - remote_version : newest remote release, None until fetched
+    - text / lines : the version file up to and including the local release,
+      lines are stripped and non-empty. Older history is never downloaded.
+    - file_info : size/checksum fields of the files to download, filled by get_remote_updates
+    """
+    def __init__(self, aircraft_id):
+        self.aircraft_id = aircraft_id
+        self.url = get_server_version_file(aircraft_id)
+        self.local_version = get_latest_release(get_local_version_file(aircraft_id))
+        self.remote_version = None
+        self.text = None
+        self.lines = None
+        self.file_info = {}
+
+    def fetch(self):
+        """
+        Stream the remote version file, only the first call touches the network.
+        Reading stops at the local release, the rest of the history is not transferred.
+        If the mirror fails the next one is tried, url ends up pointing at the one used.
+        """
+        if self.lines is not None:
+            return self
+
+        mirrors = rank_mirrors(self.aircraft_id)
+        for index, mirror in enumerate(mirrors):
+            url = f"{mirror}{self.aircraft_id}_{version_filename}"
+            try:
+                self.text, self.lines, self.remote_version = self._read(url)
+                self.url = url
+                break
+            except URLError as e:
+                if index == len(mirrors) - 1:
+                    raise
+                demote_mirror(self.aircraft_id, mirror)
+                log_warn(f"Version file from '{mirror}' failed ({e}), trying '{mirrors[index + 1]}'", tag="MIRROR_FAILOVER")
+
+        log_info(f"Read {len(self.lines)} lines of '{self.url}', newest release {self.remote_version}", tag="UPDATE_SESSION")
+        return self
+
+    def _read(self, url):
+        """Read url up to the local release, returns (text, lines, newest release)."""
+        local_tuple = parse_release(self.local_version) if self.local_version else None
+        remote_version = None
+        text_lines = []
+        lines = []
+        with http_client.open_cached(url, http_cache_dir) as stream:
+            for raw_line in stream:
+                line = raw_line.decode("utf-8")
+                text_lines.append(line)
+                stripped = line.strip()
+                if stripped:
+                    lines.append(stripped)
+                if stripped.lower().startswith("release-"):
+                    if remote_version is None:
+                        remote_version = stripped
+                    if local_tuple is not None and parse_release(stripped) <= local_tuple:
+                        # kept so the local version file still names a release
+                        break
+        return "".join(text_lines), lines, remote_version
+
+
+def get_remote_updates(aircraft_id, session=None):
+    if session is None:
+        session = UpdateSession(aircraft_id)
+    local_newest = session.local_version
+    try:
+        server_newest = session.fetch().remote_version
+    except Exception as e:
+        log_error(f"Failed to get remote version: {e}", include_args=True)
+        server_newest = None
     if server_newest is None:
         log_error(f"get_remote_updates({aircraft_id}):  Cannot fetch server version", include_args=True)
         return "error", "remote_fetch_failed, server_newest is None"
@@ -435,15 +769,10 @@ def get_remote_updates(aircraft_id):
     log_info(f"Local Version: {local_newest}", include_args=True)
     log_info(f"Server Version: {server_newest}", include_args=True)
     
-    # download the full server version file for processing since its newer then local
     try:
-        urllib.request.urlretrieve(get_server_version_file(aircraft_id), server_version_file)
-        msg = f"Downloaded server version file to: '{server_version_file}'"
-        #print(msg)
-        log_info(f"{msg}", include_args=True)
-
-        # parse server file and collect updates
-        download_files, delete_folders = parse_server_file(server_version_file, local_newest, server_newest)
+        # parse server file and collect updates, the session already holds it in memory
+        session.file_info.clear()
+        download_files, delete_folders = parse_server_file(session.url, local_newest, server_newest, lines=session.lines, file_info=session.file_info)
 
         #print("\nFiles to download: ", download_files)
         #print("\nFolders to delete: ", delete_folders)
@@ -461,8 +790,25 @@ def get_remote_updates(aircraft_id):
         return "error", msg
 
 
-def clean_up_operation(update = True, delete = True, echo = True):
+def clean_up_operation(update = True, delete = True, echo = True, session = None):
+    """
+    Replace the local version file with the server's once an update ran.
+    With a session the in-memory copy is written directly, otherwise
+    server_version_file is copied and then deleted.
+    """
     #print("\n")
+    if session is not None:
+        if update:
+            local_version_file = get_local_version_file(session.aircraft_id)
+            try:
+                with open(local_version_file, "w", encoding="utf-8") as f:
+                    f.write(session.text)
+                log_info(f"replaced '{local_version_file}' with the server version file", include_args=False)
+            except (OSError, TypeError) as e:
+                log_error(f"Failed to write local version file '{local_version_file}': {e}")
+        if update and echo:
+            print(f"Updated '{get_local_version_file(session.aircraft_id)}' with the version from the server.")
+        return
     if update:
         try:
             shutil.copyfile(server_version_file, get_local_version_file(current_aircraft_id))
@@ -486,35 +832,735 @@ def clean_up_operation(update = True, delete = True, echo = True):
             print(f"{os.path.basename(get_local_version_file(current_aircraft_id))} not updated, {os.path.basename(server_version_file)} file not deleted\n")
 
 
-def process_downloads(download_files, aircraft_id, update_callback=None):
+def get_download_concurrency(aircraft_id, url=None):
+    """
+    Number of downloads to run in parallel for a preset.
+    - Preset 'max_concurrent_downloads' overrides the program setting
+    - program 'host_concurrency' can cap a single host, eg. {"86thvfw.com": 2}
+    Always returns at least 1.
+    """
+    program = config.get("program", {}) or {}
+    workers = _concurrency_value(program.get("max_concurrent_downloads")) or DEFAULT_CONCURRENT_DOWNLOADS
+
+    preset_workers = _concurrency_value(aircrafts.get(aircraft_id, {}).get("max_concurrent_downloads"))
+    if preset_workers:
+        workers = preset_workers
+
+    host_limit = get_host_limit(url) if url else None
+    if host_limit:
+        workers = min(workers, host_limit)
+    return workers
+
+
+def get_host_limit(url):
+    """Parallel connections allowed to url's host by program 'host_concurrency', None if unlimited."""
+    host = urllib.parse.urlsplit(url).hostname or ""
+    return _concurrency_value((config.get("program", {}).get("host_concurrency") or {}).get(host))
+
+
+_host_connections = {} # host -> download connections open to it
+_host_connections_changed = threading.Condition()
+
+
+@contextmanager
+def reserve_host_connections(url, count, at_least=0):
+    """
+    Reserve up to count download connections to url's host within its 'host_concurrency' limit.
+    Yields how many were granted. Waits until at_least of them are free, each
+    download takes its own connection with at_least=1, segmented downloads ask
+    for their extra connections from what is left without waiting.
+    Hosts without a limit get count.
+    """
+    host = urllib.parse.urlsplit(url).hostname or ""
+    limit = get_host_limit(url)
+    with _host_connections_changed:
+        if limit:
+            _host_connections_changed.wait_for(lambda: limit - _host_connections.get(host, 0) >= min(at_least, limit))
+            granted = max(at_least, min(count, limit - _host_connections.get(host, 0)))
+        else:
+            granted = count
+        _host_connections[host] = _host_connections.get(host, 0) + granted
+    try:
+        yield granted
+    finally:
+        with _host_connections_changed:
+            _host_connections[host] -= granted
+            _host_connections_changed.notify_all()
+
+
+def _number_value(value, name):
+    """A numeric setting as a float, None if it is not a number (YAML may hand over strings)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        log_warn(f"Invalid {name} value '{value}', ignoring it")
+        return None
+
+
+def _concurrency_value(value):
+    """A concurrency setting as a positive int, None if unset, 0 or invalid (YAML may hand over strings)."""
+    if value is None or value == "":
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        log_warn(f"Invalid concurrency value '{value}', ignoring it")
+        return None
+    return value if value > 0 else None
+
+
+def get_extract_queue_depth():
+    """Downloaded zips allowed to wait for extraction, program config 'extract_queue_depth'."""
+    return _concurrency_value(config.get("program", {}).get("extract_queue_depth")) or DEFAULT_EXTRACT_QUEUE_DEPTH
+
+
+def get_extract_workers():
+    """
+    Threads new_safe_unzip extracts members on, program config 'extract_workers'.
+    0 or unset uses one per CPU, up to MAX_EXTRACT_WORKERS. Always returns at least 1.
+    """
+    workers = config.get("program", {}).get("extract_workers") or 0
+    try:
+        workers = int(workers)
+    except (TypeError, ValueError):
+        log_warn(f"Invalid extract_workers value '{workers}', using one per CPU")
+        workers = 0
+    if workers <= 0:
+        workers = min(MAX_EXTRACT_WORKERS, os.cpu_count() or 1)
+    return workers
+
+
+def _locked_callback(update_callback):
+    """
+    Wrap update_callback so worker threads take turns calling it.
+    The curses views are not thread safe, so only one event is drawn at a time.
+    """
+    if update_callback is None:
+        return None
+    lock = threading.Lock()
+
+    def callback(*args, **kwargs):
+        with lock:
+            update_callback(*args, **kwargs)
+    return callback
+
+
+def get_download_size(download_files, file_info):
+    """
+    Add up the known sizes of download_files from file_info (see parse_server_file).
+    Returns (total bytes, number of files without a size)
+    """
+    total = 0
+    unknown = 0
+    for file in download_files:
+        size = (file_info or {}).get(file, {}).get("size")
+        if size is None:
+            unknown += 1
+        else:
+            total += size
+    return total, unknown
+
+
+def plan_update(download_files, aircraft_id, file_info):
+    """
+    Preflight check before anything is downloaded, does the update fit on the disk and how long will it take.
+    Sizes missing from file_info are asked for with parallel HEAD requests and stored back into file_info.
+    Unpacked sizes come from the version file, without one the zip size is used as a guess.
+
+    The space needed is everything unpacked plus the zips that can sit on disk at the same
+    time (one per download worker and extraction queue slot), none when streaming.
+    Files being replaced still count in full, so the estimate errs on the safe side.
+
+    Returns a dict:
+    - download_bytes / unpacked_bytes / required_bytes / free_bytes
+    - unknown : files whose size could not be found
+    - seconds : projected duration from the last measured throughput, None if never measured
+    - fits : False when required_bytes is more than free_bytes
+    """
+    missing = [file for file in download_files if "size" not in file_info.get(file, {})]
+    if missing:
+        base_url = get_remote_livery_url(aircraft_id)
+        workers = min(get_download_concurrency(aircraft_id, base_url), len(missing))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preflight") as pool:
+            for file, size in zip(missing, pool.map(lambda file: _head_size(base_url + file), missing)):
+                if size is not None:
+                    file_info.setdefault(file, {})["size"] = size
+
+    download_bytes = 0
+    unpacked_bytes = 0
+    sizes = []
+    unknown = []
+    for file in download_files:
+        info = file_info.get(file, {})
+        if "size" not in info:
+            unknown.append(file)
+            continue
+        download_bytes += info["size"]
+        unpacked_bytes += info.get("unpacked_size", info["size"])
+        sizes.append(info["size"])
+
+    zips_on_disk = 0
+    if not streaming_extract_enabled():
+        queue_depth = get_extract_queue_depth()
+        slots = get_download_concurrency(aircraft_id) + queue_depth + 1 # +1 for the zip being extracted
+        zips_on_disk = sum(sorted(sizes, reverse=True)[:slots])
+    required_bytes = unpacked_bytes + zips_on_disk
+
+    target = liveries_folder if os.path.isdir(liveries_folder) else os.path.dirname(os.path.abspath(liveries_folder))
+    free_bytes = shutil.disk_usage(target).free
+
+    throughput = manifest.get_preset_metadata(aircraft_id).get("bytes_per_second")
+    seconds = download_bytes / throughput if throughput else None
+
+    plan = {
+        "download_bytes": download_bytes,
+        "unpacked_bytes": unpacked_bytes,
+        "required_bytes": required_bytes,
+        "free_bytes": free_bytes,
+        "unknown": unknown,
+        "seconds": seconds,
+        "fits": required_bytes <= free_bytes,
+    }
+    log_info(f"Preflight for {len(download_files)} files: {plan}", tag="PREFLIGHT")
+    return plan
+
+
+def _head_size(url):
+    """Content-Length of url from a HEAD request, None if the server does not say."""
+    try:
+        length = http_client.head(url).get("Content-Length")
+        return int(length) if length is not None else None
+    except Exception as e:
+        log_warn(f"HEAD '{url}' failed: {e}", tag="PREFLIGHT")
+        return None
+
+
+def check_file_info(path, info):
+    """
+    Compare a downloaded file against its version file fields.
+    Only the fields present are checked, the file is hashed once for both checksums.
+    Returns a description of the first mismatch, None if the file matches.
+    """
+    if not info:
+        return None
+    size = os.path.getsize(path)
+    if "size" in info and size != info["size"]:
+        return f"size {size} does not match {info['size']}"
+    if "sha256" not in info and "crc32" not in info:
+        return None
+
+    sha256 = hashlib.sha256()
+    crc = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            sha256.update(chunk)
+            crc = zlib.crc32(chunk, crc)
+    if "sha256" in info and sha256.hexdigest() != info["sha256"]:
+        return "sha256 mismatch"
+    if "crc32" in info and f"{crc:08x}" != info["crc32"].zfill(8):
+        return "crc32 mismatch"
+    return None
+
+
+def process_downloads(download_files, aircraft_id, update_callback=None, file_info=None):
+    """
+    Download and unpack every file in download_files for aircraft_id.
+
+    Runs as a three stage pipeline so the network and the disk are busy at the same time:
+      1. download workers (see get_download_concurrency) fetch zips
+      2. one extraction thread unpacks them from a bounded queue
+      3. this thread commits the results to the manifest
+    The extraction queue holds at most 'extract_queue_depth' zips (program config),
+    downloads wait for room, which caps how many zips sit on disk at once.
+    Each file reports its own download/extract events through update_callback.
+
+    With file_info (see parse_server_file) the largest files start first so one big
+    file does not run alone at the end, and saved zips are checked against their
+    size/checksum fields. Streamed zips rely on the CRC of each member instead.
+    """
     # Build our destination folder to use the current_aircraft id for its subfolder
     destination_folder = os.path.normpath(os.path.join(liveries_folder, aircrafts[aircraft_id]["folder"]))
     os.makedirs(destination_folder, exist_ok=True)
+    if not download_files:
+        return
+
+    callback = _locked_callback(update_callback)
+    workers = min(get_download_concurrency(aircraft_id, get_remote_livery_url(aircraft_id)), len(download_files))
+    queue_depth = get_extract_queue_depth()
+    extract_queue = queue.Queue(maxsize=queue_depth)
+    commit_queue = queue.Queue()
+    log_info(f"Downloading {len(download_files)} files with {workers} workers, extract queue depth {queue_depth}", tag="DOWNLOADING_START")
+
+    file_info = file_info or {}
+    if file_info:
+        # unknown sizes go last, sorted() keeps their order
+        download_files = sorted(download_files, key=lambda file: file_info.get(file, {}).get("size", -1), reverse=True)
+
+    extractor = threading.Thread(
+        target=_extract_stage,
+        args=(extract_queue, commit_queue, aircraft_id, callback),
+        name="extract",
+        daemon=True
+    )
+    extractor.start()
 
-    for file in download_files:
-        file_url = get_remote_livery_url(aircraft_id) + file
-        destination_file = os.path.normpath(os.path.join(destination_folder, file))
-        log_info(f"Processing Download for {file}", tag="DOWNLOADING_START")
-        log_info(f"File URL: {file_url}")
-        log_info(f"Destination Folder: {destination_file}")
-        start_time = time.time()
+    def post_crash(future, file):
+        # a stage that raises never sent its result, send one so the loop below is not left waiting
+        error = future.exception()
+        if error is not None:
+            log_error(f"Download stage for '{file}' crashed: {error!r}")
+            commit_queue.put((file, [], {}))
 
-        try:
-            # Download the file
+    start_time = time.time()
+    received_before = http_client.bytes_received()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as pool:
+            for file in download_files:
+                future = pool.submit(_download_stage, file, aircraft_id, destination_folder, callback, extract_queue, commit_queue, file_info.get(file))
+                future.add_done_callback(lambda future, file=file: post_crash(future, file))
+
+            # every file sends exactly one result to the commit stage
+            for _ in download_files:
+                _commit_stage(commit_queue.get(), aircraft_id)
+    finally:
+        # also when the commit stage raised, the extraction thread must not wait forever
+        extract_queue.put(None)
+        extractor.join()
+    _record_throughput(aircraft_id, http_client.bytes_received() - received_before, time.time() - start_time)
+
+
+def _record_throughput(aircraft_id, transferred, elapsed):
+    """
+    Store how fast this run went, plan_update uses it to project the next one.
+    transferred is what actually came over the network: partial updates, patches
+    and cached zips move far less than the zips' sizes. Runs that fetched
+    nothing say nothing about the connection and are not recorded.
+    """
+    if not transferred or elapsed <= 0:
+        return
+    try:
+        manifest.update_preset_metadata(aircraft_id, bytes_per_second=transferred / elapsed)
+        log_info(f"{transferred} bytes in {elapsed:.2f} seconds, {transferred / elapsed:.0f} bytes/s", tag="THROUGHPUT")
+    except Exception as e:
+        log_warn(f"Could not store throughput: {e}", tag="THROUGHPUT")
+
+
+def _download_stage(file, aircraft_id, destination_folder, update_callback, extract_queue, commit_queue, info=None):
+    """
+    Pipeline stage 1, runs on a download worker thread.
+    Fetches a single file, checks it against info when given, then queues it for extraction.
+    Mirrors are tried fastest first, a file that fails on one mirror moves on to the next.
+    With the download cache enabled a cached copy of the zip is used instead of downloading.
+    Files that fail here go straight to the commit stage with nothing to record.
+    """
+    destination_file = os.path.normpath(os.path.join(destination_folder, file))
+    log_info(f"Processing Download for {file}", tag="DOWNLOADING_START")
+    log_info(f"Destination Folder: {destination_file}")
+    start_time = time.time()
+
+    def on_retry(retry, retries, error, delay):
+        log_warn(f"Download of '{file}' failed ({error}), retry {retry}/{retries} in {delay:.1f}s", tag="DOWNLOAD_RETRY")
+        if update_callback:
+            update_callback(f"{file} - retry {retry}/{retries} in {delay:.0f}s - {error}", file=file, action="download", done=False)
+
+    try:
+        # a bad retry setting fails this file like any other error
+        policy = get_retry_policy()
+
+        # Download the file
+        if update_callback:
+            update_callback(f"{file}", file=file, action="download", done=False)
+
+        succeeded = None
+        cache_key = _download_cache_key(file, aircraft_id, info)
+        if download_cache.lookup(cache_key, destination_file):
+            log_info(f"Using cached copy of '{file}'", tag="DOWNLOAD_CACHE")
+            mirrors = []
+        else:
+            mirrors = rank_mirrors(aircraft_id)
+
+        for index, mirror in enumerate(mirrors):
+            file_url = mirror + file
+            log_info(f"File URL: {file_url}")
+            try:
+                # every attempt picks up what the last one left behind ('.part' files)
+                with reserve_host_connections(file_url, 1, at_least=1):
+                    succeeded = http_client.call_with_retry(
+                        lambda: _fetch_file(file, file_url, destination_file, aircraft_id, info, policy.timeout, update_callback),
+                        policy, url=file_url, on_retry=on_retry
+                    )
+                break
+            except URLError as e: # HTTPError and ContentTooShortError included
+                if index == len(mirrors) - 1:
+                    raise
+                if not (isinstance(e, HTTPError) and e.code < 500):
+                    demote_mirror(aircraft_id, mirror) # a missing file says nothing about the mirror's health
+                log_warn(f"Download of '{file}' from '{mirror}' failed ({e}), trying '{mirrors[index + 1]}'", tag="MIRROR_FAILOVER")
+                if update_callback:
+                    update_callback(f"{file} - mirror failed, trying {urllib.parse.urlsplit(mirrors[index + 1]).netloc}", file=file, action="download", done=False)
+
+        if succeeded is not None:
+            # streamed or patched in place, already unpacked
+            commit_queue.put((file, *succeeded))
+            return
+
+        mismatch = check_file_info(destination_file, info)
+        if mismatch:
+            log_error(f"Downloaded '{file}' failed verification: {mismatch}")
+            safe_delete(destination_file)
             if update_callback:
-                update_callback(f"{file}", file=file, action="download", done=False)
-            urllib.request.urlretrieve(file_url, destination_file)
-            elapsed = time.time() - start_time
-            manifest.add_file(aircraft_id, destination_file)
+                update_callback(f"{file} - Verification Failed - {mismatch}", file=file, action="download", error=True)
+            commit_queue.put((file, [], {}))
+            return
+        elapsed = time.time() - start_time
+        if update_callback:
+            update_callback(f"{file} - Success{'' if mirrors else ' (cached)'}", file=file, action="download", done=True)
+        log_info(f"Download Completed of '{file}' in {elapsed:.2f} seconds", tag="DOWNLOAD_END")
+
+        # blocks while the extraction queue is full
+        extract_queue.put((file, destination_file, cache_key))
+        return
+
+    except HTTPError as e:
+        log_error(f"HTTP error {e.code} {e.reason} while downloading '{file}'")
+        if update_callback:
+            update_callback(f"{file} - {e.code} {e.reason}", file=file, action="download", error=True)
+    except URLError as e:
+        log_error(f"Network error while downloading '{file}': {e}")
+        if update_callback:
+            update_callback(f"{file} - Network Error - {e}", file=file, action="download", error=True)
+    except ContentTooShortError as e:
+        log_error(f"Download incomplete for '{file}': {e}")
+        if update_callback:
+            update_callback(f"{file} - Download Incomplete - {e}", file=file, action="download", error=True)
+    except (OSError, PermissionError) as e:
+        log_error(f"Local file error for '{file}': {e}")
+        if update_callback:
+            update_callback(f"{file} - local file issue {e}", file=file, action="download", error=True)
+    except Exception as e:
+        log_error(f"Unexpected error downloading '{file}': {e} | {traceback.format_exc()}")
+        if update_callback:
+            update_callback(f"{file} - {e}", file=file, action="download", error=True)
+
+    commit_queue.put((file, [], {}))
+
+
+def _download_cache_key(file, aircraft_id, info):
+    """
+    Download cache key for file, None when the cache is off or the file cannot be identified.
+    Without a sha256 in the version file the server's ETag/Last-Modified is asked for with a HEAD request.
+    """
+    if not download_cache.enabled():
+        return None
+    if (info or {}).get("sha256"):
+        return download_cache.make_key(None, sha256=info["sha256"])
+    file_url = get_remote_livery_url(aircraft_id) + file
+    try:
+        headers = http_client.head(file_url)
+    except Exception as e:
+        log_warn(f"Cannot identify '{file}' for the download cache: {e}", tag="DOWNLOAD_CACHE")
+        return None
+    return download_cache.make_key(file_url, validator=headers.get("ETag") or headers.get("Last-Modified"))
+
+
+def get_retry_policy():
+    """
+    Build the download retry policy from the program config:
+    download_attempts, retry_backoff, retry_max_backoff, retry_statuses and network_timeout.
+    """
+    program = config.get("program", {})
+    defaults = http_client.RetryPolicy()
+    return http_client.RetryPolicy(
+        attempts=program.get("download_attempts") or defaults.attempts,
+        backoff=program.get("retry_backoff", defaults.backoff),
+        max_backoff=program.get("retry_max_backoff", defaults.max_backoff),
+        retry_statuses=program.get("retry_statuses") or defaults.retry_statuses,
+        timeout=program.get("network_timeout") or defaults.timeout
+    )
+
+
+def _fetch_file(file, file_url, destination_file, aircraft_id, info, timeout, update_callback):
+    """
+    One download attempt of file, picking binary patches, a partial update, segmented,
+    streamed or plain download.
+    Returns (extracted paths, member_info) when the zip was unpacked on the fly
+    or its files were patched in place, None when it was saved to destination_file.
+    """
+    patch_files = (info or {}).get("patches")
+    if patch_files:
+        result = _apply_patches(file, file_url, destination_file, aircraft_id, patch_files, timeout, update_callback)
+        if result is not None:
+            return result
+
+    # runs after the cache lookup missed, the zip is then updated in place and not cached
+    if partial_updates_enabled():
+        try:
+            result = _partial_update(file, file_url, destination_file, aircraft_id, timeout, update_callback,
+                                     repair=(info or {}).get("repair", ()))
+            if result is not None:
+                return result
+        except (http_client.RangesUnsupported, ziptools.StreamingUnsupported, zipfile.BadZipFile) as e:
+            log_warn(f"Cannot update '{file}' in place ({e}), downloading all of it", tag="PARTIAL_FALLBACK")
+
+    segments = get_download_segments((info or {}).get("size"))
+    if segments > 1:
+        try:
+            _segmented_download(file, file_url, destination_file, segments, timeout, update_callback)
+            return None
+        except http_client.RangesUnsupported as e:
+            log_warn(f"Cannot download '{file}' in segments ({e}), using a single connection", tag="SEGMENT_FALLBACK")
+
+    # streamed zips never exist on disk, so they cannot be cached
+    if streaming_extract_enabled() and not download_cache.enabled():
+        try:
+            return _stream_download(file, file_url, destination_file, aircraft_id, timeout, update_callback)
+        except ziptools.StreamingUnsupported as e:
+            log_warn(f"Cannot extract '{file}' while downloading ({e}), saving the zip first", tag="STREAM_FALLBACK")
+
+    # resumes from '<file>.part' if an earlier run was interrupted
+    http_client.download_file(file_url, destination_file, timeout=timeout)
+    return None
+
+
+def _apply_patches(file, file_url, destination_file, aircraft_id, patch_files, timeout, update_callback):
+    """
+    Update the files extracted from file with binary patches instead of downloading it.
+
+    Patch files are fetched from the same folder as the zip and applied in order,
+    each one checks that its base files match the md5 recorded for them (by an
+    earlier patch of this run, or the manifest) and the content on disk before
+    anything is replaced (see core/delta.py).
+
+    Returns (patched paths, member_info) for the commit stage, or None when a base
+    does not match, a patch is damaged or missing on the server; the caller then
+    downloads the full zip, which overwrites whatever patches did apply.
+    Other network errors are raised so the attempt is retried like any download.
+    """
+    destination_folder = os.path.dirname(destination_file)
+    abs_root = os.path.abspath(destination_folder)
+    patch_path = f"{destination_file}.delta"
+    written = []
+    member_info = {}
+
+    def resolve_target(relative_path):
+        return _safe_zip_target(destination_folder, abs_root, relative_path)
+
+    def known_hash(path):
+        # the manifest is only updated by the commit stage, a file patched earlier
+        # in this chain already has the hash the next patch expects
+        if path in member_info:
+            return member_info[path][2]
+        return manifest.get_file_hash(aircraft_id, path)
+
+    for patch_file in patch_files:
+        patch_url = urllib.parse.urljoin(file_url, patch_file)
+        try:
+            http_client.download_file(patch_url, patch_path, timeout=timeout)
+            results = delta.apply_patch(patch_path, resolve_target, known_hash)
+        except (delta.PatchError, ValueError) as e:
+            log_warn(f"Cannot apply '{patch_file}' to '{file}' ({e}), downloading the zip", tag="PATCH_FALLBACK")
+            return None
+        except HTTPError as e:
+            if e.code >= 500:
+                raise
+            log_warn(f"Cannot fetch '{patch_file}' ({e.code} {e.reason}), downloading '{file}'", tag="PATCH_FALLBACK")
+            return None
+        finally:
+            if os.path.exists(patch_path):
+                safe_delete(patch_path)
+
+        for path, crc32, size, md5 in results:
+            if path not in member_info:
+                written.append(path)
+            member_info[path] = (crc32, size, md5)
+            log_info(f"Patched '{path}' with '{patch_file}'", tag="PATCH")
             if update_callback:
-                update_callback(f"{file} - Success", file=file, action="download", done=True)
-            log_info(f"Download Completed of '{file}' in {elapsed:.2f} seconds", tag="DOWNLOAD_END")
+                update_callback(f"{path} - Patched", file=path, action="extract", done=True)
+
+    if update_callback:
+        update_callback(f"{file} - Success ({len(patch_files)} patch{'es' if len(patch_files) > 1 else ''})", file=file, action="download", done=True)
+    return written, member_info
+
+
+def partial_updates_enabled():
+    """True unless program config 'partial_updates' turns fetching only changed zip members off."""
+    return bool(config.get("program", {}).get("partial_updates", True))
+
+
+def _partial_update(file, file_url, destination_file, aircraft_id, timeout, update_callback, repair=()):
+    """
+    Update an installed zip by fetching only the members that changed.
+
+    The remote zip's central directory is read with range requests and every
+    member is compared against the CRC and size the manifest recorded when the
+    zip was last extracted. Files listed in repair (see prepare_repair) count as
+    changed whatever was recorded. Runs of changed members are fetched as one byte
+    range each and unpacked like a streamed zip, every file is written to a
+    temporary name and renamed once its CRC checked out.
+
+    Returns (written paths, member_info) for the commit stage, or None when a full
+    download is the better deal: nothing recorded for this zip yet, or more than
+    PARTIAL_UPDATE_MAX_RATIO of the zip changed.
+    Raises http_client.RangesUnsupported when the server cannot serve ranges.
+    """
+    installed = manifest.get_zip_members(aircraft_id, file)
+    if not installed:
+        return None
 
+    headers = http_client.head(file_url, timeout=timeout)
+    length = headers.get("Content-Length")
+    validator = headers.get("ETag") or headers.get("Last-Modified")
+    if headers.get("Accept-Ranges", "").lower() != "bytes" or not length or not validator:
+        raise http_client.RangesUnsupported(f"'{file_url}' does not support range requests")
+    length = int(length)
+
+    def read_range(start, end):
+        with http_client.open_range(file_url, start, end, validator, timeout) as response:
+            data = response.read()
+        if len(data) != end - start + 1:
+            raise ContentTooShortError(f"range {start}-{end} of '{file_url}' ended after {len(data)} bytes", (None, None))
+        return data
+
+    members = ziptools.read_central_directory(read_range, length)
+    extract_root, needs_wrapper = get_zip_extract_root(destination_file, [member.filename for member in members])
+    abs_zip_root = os.path.abspath(os.path.dirname(destination_file))
+    targets = {member.filename: _safe_zip_target(extract_root, abs_zip_root, member.filename) for member in members}
+    repair = {os.path.abspath(path) for path in repair}
+
+    def unchanged(member):
+        target = targets[member.filename]
+        return (member.is_dir()
+                or (os.path.abspath(target) not in repair
+                    and installed.get(target) == (member.crc, member.file_size)
+                    and os.path.isfile(target) and os.path.getsize(target) == member.file_size))
+
+    # group members that sit next to each other in the zip into one range
+    runs = []
+    previous_changed = False
+    for member in sorted(members, key=lambda member: member.header_offset):
+        changed = not unchanged(member)
+        if changed and previous_changed:
+            runs[-1].append(member)
+        elif changed:
+            runs.append([member])
+        previous_changed = changed
+
+    changed_members = [member for run in runs for member in run]
+    changed_bytes = sum(member.data_end - member.header_offset + 1 for member in changed_members)
+    if changed_bytes > length * PARTIAL_UPDATE_MAX_RATIO:
+        log_info(f"{len(changed_members)}/{len(members)} members of '{file}' changed ({changed_bytes} of {length} bytes), downloading all of it", tag="PARTIAL_UPDATE")
+        return None
+    log_info(f"{len(changed_members)}/{len(members)} members of '{file}' changed, fetching {changed_bytes} of {length} bytes in {len(runs)} ranges", tag="PARTIAL_UPDATE")
+
+    written = []
+    member_info = {}
+    if needs_wrapper:
+        os.makedirs(extract_root, exist_ok=True)
+        written.append(extract_root)
+    for run in runs:
+        with http_client.open_range(file_url, run[0].header_offset, run[-1].data_end, validator, timeout) as response:
+            for member, extract in ziptools.iter_stream_members(response):
+                target = targets.get(member.filename)
+                if target is None:
+                    raise zipfile.BadZipFile(f"'{member.filename}' is not in the central directory")
+                if member.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                else:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    temp_target = f"{target}.partial"
+                    try:
+                        md5 = _write_hashed(temp_target, extract)
+                        os.replace(temp_target, target)
+                    finally:
+                        if os.path.exists(temp_target):
+                            os.remove(temp_target)
+                    member_info[target] = (member.crc, member.file_size, md5)
+                written.append(target)
+                log_info(f"Updated {member.filename} in '{extract_root}'", tag="PARTIAL_UPDATE")
+                if update_callback:
+                    update_callback(f"{target} - Success", file=target, action="extract", done=True)
+
+    if update_callback:
+        update_callback(f"{file} - Success ({len(changed_members)}/{len(members)} changed)", file=file, action="download", done=True)
+    return written, member_info
+
+
+def get_download_segments(size):
+    """
+    How many byte ranges to fetch a file of size bytes in, 1 means a plain download.
+    Files of at least 'segment_threshold_mb' (program config) are split into 'download_segments'.
+    """
+    program = config.get("program", {})
+    threshold = program.get("segment_threshold_mb", DEFAULT_SEGMENT_THRESHOLD_MB)
+    if threshold is None:
+        return 1
+    threshold = _number_value(threshold, "segment_threshold_mb")
+    if threshold is None:
+        threshold = DEFAULT_SEGMENT_THRESHOLD_MB
+    segments = _concurrency_value(program.get("download_segments")) or DEFAULT_DOWNLOAD_SEGMENTS
+    if not size or size < threshold * 1024 * 1024:
+        return 1
+    return segments
+
+
+def _segmented_download(file, file_url, destination_file, segments, timeout, update_callback):
+    """Fetch one large file as parallel byte ranges, reporting progress on the file's download line."""
+    last_percent = None
+
+    def progress(done, total, segments_done, segment_count):
+        nonlocal last_percent
+        percent = done * 100 // total if total else 100
+        if update_callback and percent != last_percent:
+            last_percent = percent
+            update_callback(f"{file} - {percent}% ({segments_done}/{segment_count} segments)", file=file, action="download", done=False)
+
+    # the download worker holds one connection already, the others count against the host limit
+    with reserve_host_connections(file_url, segments - 1) as extra:
+        log_info(f"Downloading '{file}' in {segments} segments over {extra + 1} connections", tag="SEGMENTED_DOWNLOAD")
+        http_client.download_segmented(file_url, destination_file, segments=segments, progress=progress,
+                                       timeout=timeout, connections=extra + 1)
+
+
+def _stream_download(file, file_url, destination_file, aircraft_id, timeout, update_callback):
+    """
+    Download a zip and unpack it in the same pass with stream_unzip.
+    Returns (extracted paths, member_info) for the commit stage.
+    """
+    start_time = time.time()
+    member_info = {}
+    with http_client.urlopen(file_url, timeout=timeout) as response:
+        status, succeeded, failed = stream_unzip(response, destination_file, aircraft_id, member_info=member_info)
+
+    elapsed = time.time() - start_time
+    if update_callback:
+        update_callback(f"{file} - Success", file=file, action="download", done=True)
+        for f in succeeded:
+            update_callback(f"{f} - Success", file=f, action="extract", done=True)
+    log_info(f"Download and unpack of '{file}' completed in {elapsed:.2f} seconds: {status}", tag="STREAM_END")
+    return succeeded, member_info
+
+
+def _extract_stage(extract_queue, commit_queue, aircraft_id, update_callback):
+    """
+    Pipeline stage 2, runs on the extraction thread until it receives None.
+    Unpacks each downloaded zip and passes the extracted paths to the commit stage.
+    """
+    while True:
+        item = extract_queue.get()
+        if item is None:
+            return
+        file, destination_file, cache_key = item
+        succeeded = []
+        recorded = [destination_file]
+        member_info = {}
+
+        try:
             # Unpack the file if it is a zip
             if zipfile.is_zipfile(destination_file):
                 try:
-                    # Call the new safe unzip function
-                    status, succeeded, failed = new_safe_unzip(destination_file, aircraft_id)
+                    # manifest rows are written by the commit stage
+                    status, succeeded, failed = new_safe_unzip(destination_file, aircraft_id, record_manifest=False, member_info=member_info)
+                    recorded.extend(succeeded)
 
                     # Report via callback
                     if update_callback:
@@ -525,20 +1571,23 @@ def process_downloads(download_files, aircraft_id, update_callback=None):
 
                     log_info(f"Unpack Complete for '{file}': {status}", tag="EXTRACTING_END")
 
-                    # Only remove ZIP if any extraction succeeded
-                    if succeeded:
+                    # Only remove ZIP if every member extracted, a retry needs it otherwise
+                    if succeeded and not failed:
                         try:
-                            safe_delete(destination_file)
-                            log_info(f"Removed ZIP file '{file}' after extraction", tag="DELETING_FILE")
+                            if cache_key:
+                                download_cache.store(cache_key, destination_file)
+                                log_info(f"Moved ZIP file '{file}' to the download cache after extraction", tag="DOWNLOAD_CACHE")
+                            else:
+                                safe_delete(destination_file)
+                                log_info(f"Removed ZIP file '{file}' after extraction", tag="DELETING_FILE")
                         except Exception as e_rm:
                             log_error(f"Failed to remove zip '{destination_file}': {e_rm}")
-                except (OSError, PermissionError, zipfile.BadZipFile) as e:
+                except (OSError, PermissionError, zipfile.BadZipFile, ValueError) as e:
                     log_error(f"Error processing zip '{file}': {e}")
 
                     if update_callback:
                         update_callback(f"{file} - Extract failed", file=file, action="extract", done=False)
                     # Do not remove the zip, continue with next file
-                    continue
             else:
                 # Not a zip file
                 log_warn(f"Downloaded file '{file}' is not a zip archive; left in place", tag="NON_ZIP")
@@ -547,23 +1596,42 @@ def process_downloads(download_files, aircraft_id, update_callback=None):
                     update_callback(f"{file} is not a zip file", file=file, action="extract", done=False)
                 # Optional: remove non-zip files
                 # safe_delete(destination_file)
+        except Exception as e:
+            log_error(f"Unexpected error extracting '{file}': {e} | {traceback.format_exc()}")
+        finally:
+            commit_queue.put((file, recorded, member_info))
 
-        except HTTPError as e:
-            log_error(f"HTTP error {e.code} {e.reason} while downloading '{file}'")
-            if update_callback:
-                update_callback(f"{file} - {e.code} {e.reason}", file=file, action="download", error=True)
-        except URLError as e:
-            log_error(f"Network error while downloading '{file}': {e}")
-            if update_callback:
-                update_callback(f"{file} - Network Error - {e}", file=file, action="download", error=True)
-        except ContentTooShortError as e:
-            log_error(f"Download incomplete for '{file}': {e}")
-            if update_callback:
-                update_callback(f"{file} - Download Incomplete - {e}", file=file, action="download", error=True)
-        except (OSError, PermissionError) as e:
-            log_error(f"Local file error for '{file}': {e}")
-            if update_callback:
-                update_callback(f"{file} - local file issue {e}", file=file, action="download", error=True)
+
+def _member_values(member_info, path):
+    """(file_hash, crc32, file_size) for a manifest row from member_info's (crc32, file_size, md5)."""
+    crc32, file_size, md5 = member_info.get(path, (None, None, None))
+    return md5, crc32, file_size
+
+
+def _stat_signature(path):
+    """(mtime_ns, inode) of a file as it was written, recorded so scan_drift can spot changes without reading it."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None
+    return st.st_mtime_ns, st.st_ino
+
+
+def _commit_stage(result, aircraft_id):
+    """
+    Pipeline stage 3, runs on the thread that called process_downloads.
+    Records the downloaded zip and everything extracted from it in the manifest,
+    with the CRC, size and, when known, md5 of each extracted file and the zip it came from.
+    """
+    file, paths, member_info = result
+    if not paths:
+        return
+    try:
+        # one transaction per zip
+        manifest.add_files(aircraft_id, [(path, *_member_values(member_info, path), file, *_stat_signature(path)) for path in paths])
+        log_info(f"Recorded {len(paths)} paths for '{file}'", tag="MANIFEST")
+    except Exception as e:
+        log_error(f"Failed to record '{file}' in the manifest: {e}")
 
 
 def process_deletes(delete_folders, aircraft_id, update_callback=None):
@@ -631,6 +1699,7 @@ def get_aircraft_preset_list():
             "remote_subfolder": None,
             "date_created": None,
             "read_only": False,
+            "max_concurrent_downloads": None,
             "valid": False
         }
 
@@ -665,6 +1734,7 @@ def get_aircraft_preset_list():
             "remote_subfolder": contents.get("remote_subfolder", None),
             "read_only": bool(contents.get("read_only", False)),
             "date_created": contents.get("date_created"),
+            "max_concurrent_downloads": contents.get("max_concurrent_downloads"),
             "valid": True
         })
 
@@ -673,9 +1743,10 @@ def get_aircraft_preset_list():
     return OrderedDict(sorted(aircrafts.items()))
 
 
-def get_aircraft_info(aircraft_id):
+def get_aircraft_info(aircraft_id, session=None):
     """
     Collect and return relevant data for a given aircraft_id.
+    Versions come from session (an UpdateSession) when one is given.
     Returns a dict with keys:
         - id
         - name
@@ -694,13 +1765,19 @@ def get_aircraft_info(aircraft_id):
     target_folder = os.path.normpath(os.path.join(liveries_folder, folder))
 
     try:
-        local_version = get_latest_release(get_local_version_file(aircraft_id))
+        if session is not None:
+            local_version = session.local_version
+        else:
+            local_version = get_latest_release(get_local_version_file(aircraft_id))
     except Exception as e:
         log_error(f"Unable to get latest local release version: {e}", include_args=True)
         local_version = "Unknown"
     
     try:
-        remote_version = get_remote_version(get_server_version_file(aircraft_id))
+        if session is not None:
+            remote_version = session.fetch().remote_version
+        else:
+            remote_version = get_remote_version(get_server_version_file(aircraft_id))
     except Exception as e:
         log_error(f"Unable to get latest remote release version: {e}", include_args=True)
         remote_version = "Unknown"
@@ -727,6 +1804,8 @@ def startup(show_warning=False):
         print("Please run the program using interface.py, not main.py")
 
 def shutdown():
+    http_client.close_all()
+    manifest.close_all()
     logging.info(f"PROGRAM_END | version={software_version}")
 
 def safe_unzip(zip_ref, aircraft_id, *args):
@@ -766,36 +1845,41 @@ def safe_unzip(zip_ref, aircraft_id, *args):
 
     else:
         raise ValueError(f"safe_unzip() expects 2 or 3 positional arguments including zip_ref, got {1 + len(args)} (zip_ref + {len(args)} additional)")
-    conn = manifest.get_conn()
     # Hash and record f iles in manifest
+    entries = []
+    for file_path in extracted_files:
+        if os.path.isfile(file_path):
+            try:
+                entries.append((file_path, manifest.compute_file_hash(file_path), None, os.path.getsize(file_path), None, *_stat_signature(file_path)))
+            except Exception as e:
+                log_warn(f"Failed to hash '{file_path}': {e}")
+        elif os.path.isdir(file_path):
+            entries.append((file_path, None, None, None, None, None, None))
     try:
-        for file_path in extracted_files:
-            if os.path.isfile(file_path):
-                try:
-                    file_hash = manifest.compute_file_hash(file_path)
-                    manifest.add_file(aircraft_id, file_path, file_hash, conn=conn)
-                except Exception as e:
-                    log_warn(f"Failed to hash or record '{file_path}': {e}")
-            elif os.path.isdir(file_path):
-                try:
-                    manifest.add_folder(aircraft_id, file_path, conn=conn)
-                except Exception as e:
-                    log_warn(f"Failed to record folder '{file_path}': {e}")
-    finally:
-        manifest.close_conn(conn)
+        manifest.add_files(aircraft_id, entries)
+    except Exception as e:
+        log_warn(f"Failed to record {len(entries)} extracted paths: {e}")
 
 
-def new_safe_unzip(zip_path, aircraft_id):
+def new_safe_unzip(zip_path, aircraft_id, record_manifest=True, member_info=None):
     """
     Handles universal unzipping of livery packs
     - zip_path : full path to zip file
     - aircraft_id : usually the current_aircraft_d
+    - record_manifest : write extracted paths to the manifest here,
+      False when the caller records the returned paths itself
+    - member_info : optional dict, filled with {extracted path: (crc32, file_size, md5)}
+      for every extracted file so partial updates can compare against it later
 
     Checks the structure of the zip file to determine
     how to handle it. If the file needs to be extracted
     into a folder of the same name, or if it contains
     folders that need to be extracted next to the zip file.
 
+    Members are decompressed on get_extract_workers() threads, each with its
+    own ZipFile handle. zlib and md5 release the GIL, so large DEFLATE textures
+    use every core. A member that fails does not stop the others.
+
     Outputs if successful, partially successful, or failure
     Tracks files extracted to log into manifest
     """
@@ -812,49 +1896,69 @@ def new_safe_unzip(zip_path, aircraft_id):
     failed = []
 
     with zipfile.ZipFile(zip_path, 'r') as zf:
-        conn = manifest.get_conn()
+        entries = [] # manifest rows, written in one transaction at the end
         file_list = [info.filename for info in zf.infolist()]
-        root_files = {f for f in file_list if '/' not in f and not f.endswith('/')}
-        needs_wrapper = len(root_files) > 0
+        extract_root, needs_wrapper = get_zip_extract_root(zip_path, file_list)
 
         #if wrapper needed, extraction target moves inside new folder
-        extract_root = os.path.join(zip_root, os.path.splitext(os.path.basename(zip_path))[0]) \
-                       if needs_wrapper else zip_root
         if needs_wrapper:
-            extract_root = os.path.join(zip_root, os.path.splitext(os.path.basename(zip_path))[0])
             os.makedirs(extract_root, exist_ok=True)
             succeeded.append(extract_root)
-            manifest.add_file(aircraft_id, extract_root, conn=conn)
-        else:
-            extract_root = zip_root
+            entries.append((extract_root, None, None, None, None, None, None))
         
         os.makedirs(extract_root, exist_ok=True)
         
         
 
-        for member in zf.infolist():
-            normalized = os.path.normpath(member.filename)
+        # every target is checked before anything is written
+        targets = [(member, _safe_zip_target(extract_root, abs_zip_root, member.filename)) for member in zf.infolist()]
+        for member, abs_target in targets:
+            if member.is_dir():
+                os.makedirs(abs_target, exist_ok=True)
+
+        # biggest members first so one large texture does not finish last on its own
+        files = sorted(((member, abs_target) for member, abs_target in targets if not member.is_dir()),
+                       key=lambda item: item[0].compress_size, reverse=True)
+        workers = min(get_extract_workers(), len(files)) or 1
+        results = {} # member name -> (crc32, file_size, md5) or the exception it failed with
+        handles = threading.local() # a ZipFile per worker, they cannot share one file position
+        opened = []
+
+        def extract(member, abs_target):
+            worker_zf = getattr(handles, "zip_file", None)
+            if worker_zf is None:
+                worker_zf = handles.zip_file = zipfile.ZipFile(zip_path, "r")
+                opened.append(worker_zf)
+            return _extract_member(worker_zf, member, abs_target)
 
-            # construct safe absolute target
-            abs_target = os.path.abspath(os.path.join(extract_root, normalized))
-            if not abs_target.startswith(abs_zip_root + os.sep):
-                raise ValueError(f"Unsafe ZIP entry detected: {member.filename}")
-            
-            try:
-                log_info(f"Extracting {member} to '{extract_root}'")
-                zf.extract(member, extract_root)
-                succeeded.append(abs_target)
-
-                ## hash = manifest.hash_file(abs_target)
-                manifest.add_file(aircraft_id, abs_target, conn=conn)
-
-            except Exception as e:
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(extract, member, abs_target): member for member, abs_target in files}
+                for future in as_completed(futures):
+                    member = futures[future]
+                    try:
+                        results[member.filename] = future.result()
+                    except Exception as e:
+                        results[member.filename] = e
+        finally:
+            for worker_zf in opened:
+                worker_zf.close()
+
+        # report and record in zip order
+        for member, abs_target in targets:
+            values = results.get(member.filename, (None, None, None))
+            if isinstance(values, Exception):
                 failed.append(member.filename)
-                log_error(f"Failed to extract '{member.filename}': {e}")
-                raise e
-                
-            
-        manifest.close_conn(conn)
+                log_error(f"Failed to extract '{member.filename}': {values}")
+                continue
+            succeeded.append(abs_target)
+            if member_info is not None and not member.is_dir():
+                member_info[abs_target] = values
+            signature = (None, None) if member.is_dir() else _stat_signature(abs_target)
+            entries.append((abs_target, values[2], values[0], values[1], os.path.basename(zip_path), *signature))
+
+        if record_manifest:
+            manifest.add_files(aircraft_id, entries)
             
     if failed and succeeded:
         return "partial", succeeded, failed
@@ -865,6 +1969,156 @@ def new_safe_unzip(zip_path, aircraft_id):
 
 
 
+def get_zip_extract_root(zip_path, member_names):
+    """
+    Folder the members of zip_path extract into, returns (extract_root, needs_wrapper).
+    Zips with files at their root are wrapped in a folder named after the zip,
+    otherwise their folders go next to the zip.
+    """
+    zip_root = os.path.dirname(zip_path)
+    needs_wrapper = any('/' not in f and not f.endswith('/') for f in member_names)
+    if needs_wrapper:
+        return os.path.join(zip_root, os.path.splitext(os.path.basename(zip_path))[0]), True
+    return zip_root, False
+
+
+def _safe_zip_target(extract_root, abs_zip_root, member_name):
+    """
+    Absolute path a zip member extracts to.
+    Raises ValueError if it would land outside the folder the zip belongs in.
+    """
+    normalized = os.path.normpath(member_name)
+    abs_target = os.path.abspath(os.path.join(extract_root, normalized))
+    if not abs_target.startswith(abs_zip_root + os.sep):
+        raise ValueError(f"Unsafe ZIP entry detected: {member_name}")
+    return abs_target
+
+
+def _extract_member(zf, member, abs_target):
+    """
+    Extract one file member of zf, the worker thread's own ZipFile.
+    Returns (crc32, file_size, md5) of the written file, md5 is None for stored members.
+    """
+    log_info(f"Extracting {member} to '{abs_target}'")
+    os.makedirs(os.path.dirname(abs_target), exist_ok=True)
+    if ziptools.is_plain_stored(member):
+        # already compressed textures are often stored, the kernel copies their bytes
+        # without Python reading them, the zip's CRC is their recorded checksum
+        with open(zf.filename, "rb", buffering=0) as source, open(abs_target, "wb") as target:
+            ziptools.copy_stored_member(source, member, target)
+        return member.CRC, member.file_size, None
+    # hashed as it is written, no second pass over the file
+    with zf.open(member) as source:
+        md5 = _write_hashed(abs_target, lambda write: _copy_chunks(source, write))
+    return member.CRC, member.file_size, md5
+
+
+def _write_hashed(target, extract):
+    """Write a file through extract(write), returns the md5 of the bytes written."""
+    md5 = hashlib.md5()
+    with open(target, "wb") as f:
+        def write(data):
+            f.write(data)
+            md5.update(data)
+        extract(write)
+    return md5.hexdigest()
+
+
+def _copy_chunks(source, write):
+    """Feed a readable file object to write in EXTRACT_CHUNK_SIZE chunks."""
+    while chunk := source.read(EXTRACT_CHUNK_SIZE):
+        write(chunk)
+
+
+def streaming_extract_enabled():
+    """True if program config 'streaming_extract' asks to unpack zips while they download."""
+    return bool(config.get("program", {}).get("streaming_extract", False))
+
+
+def stream_unzip(stream, zip_path, aircraft_id, member_info=None):
+    """
+    Extract a zip as it is downloaded, the zip itself never touches the disk.
+    - stream : binary stream of the zip, usually an http_client response
+    - zip_path : where the zip would have been saved, decides the target folder
+    - aircraft_id : usually the current_aircraft_id
+
+    Applies the same wrapper folder and path safety rules as new_safe_unzip.
+    Whether a wrapper is needed is only known once a root level file shows up,
+    until then members go to a hidden staging folder beside the target and are
+    moved into place afterwards. Moving is a rename, no data is written twice.
+
+    Returns (status, succeeded, failed) like new_safe_unzip, nothing is written to the manifest.
+    member_info is filled like new_safe_unzip's.
+    Raises ziptools.StreamingUnsupported if the zip has to be saved and opened with zipfile,
+    members already extracted are simply overwritten by that fallback.
+    """
+    zip_root = os.path.dirname(zip_path)
+    abs_zip_root = os.path.abspath(zip_root)
+    zip_name = os.path.splitext(os.path.basename(zip_path))[0]
+    wrapper_root = os.path.join(zip_root, zip_name)
+    staging_root = os.path.join(zip_root, f".{zip_name}.streaming")
+    needs_wrapper = False
+    staged = [] # members extracted before we knew where they belong
+    succeeded = []
+    checksums = {} # member name -> (crc32, file_size, md5), known once its data was read
+
+    def write_member(member, extract, target):
+        if member.is_dir():
+            os.makedirs(target, exist_ok=True)
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        md5 = _write_hashed(target, extract)
+        checksums[member.filename] = (member.crc, member.file_size, md5)
+
+    try:
+        for member, extract in ziptools.iter_stream_members(stream):
+            is_root_file = "/" not in member.filename and not member.is_dir()
+            if is_root_file and not needs_wrapper:
+                needs_wrapper = True
+                os.makedirs(wrapper_root, exist_ok=True)
+                succeeded.append(wrapper_root)
+                succeeded.extend(_move_staged(staging_root, wrapper_root, abs_zip_root, staged))
+                staged = []
+
+            if needs_wrapper:
+                abs_target = _safe_zip_target(wrapper_root, abs_zip_root, member.filename)
+                log_info(f"Extracting {member.filename} to '{wrapper_root}'")
+                write_member(member, extract, abs_target)
+                succeeded.append(abs_target)
+            else:
+                # checked against the unwrapped target, the stricter of the two
+                _safe_zip_target(zip_root, abs_zip_root, member.filename)
+                write_member(member, extract, os.path.join(staging_root, os.path.normpath(member.filename)))
+                staged.append((member.filename, member.is_dir()))
+
+        if not needs_wrapper:
+            succeeded.extend(_move_staged(staging_root, zip_root, abs_zip_root, staged))
+    finally:
+        shutil.rmtree(staging_root, ignore_errors=True)
+
+    if member_info is not None:
+        extract_root = wrapper_root if needs_wrapper else zip_root
+        for member_name, values in checksums.items():
+            member_info[_safe_zip_target(extract_root, abs_zip_root, member_name)] = values
+
+    return "success", succeeded, []
+
+
+def _move_staged(staging_root, extract_root, abs_zip_root, staged):
+    """Move staged members of stream_unzip to their final folder, returns the final paths."""
+    moved = []
+    for member_name, is_dir in staged:
+        abs_target = _safe_zip_target(extract_root, abs_zip_root, member_name)
+        if is_dir:
+            os.makedirs(abs_target, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(abs_target), exist_ok=True)
+            os.replace(os.path.join(staging_root, os.path.normpath(member_name)), abs_target)
+        log_info(f"Extracting {member_name} to '{extract_root}'")
+        moved.append(abs_target)
+    return moved
+
+
 def safe_delete(path: str, force_delete: bool = False):
     """
     Unified delete function.
@@ -893,35 +2147,364 @@ def safe_delete(path: str, force_delete: bool = False):
     else:
         raise OSError(f"Unsupported file type: {path}")
 
-def delete_manifest_files(aircraft_id: str):
+def delete_manifest_files(aircraft_id: str, update_callback=None):
     """
     Delete all files tracked in the manifest for a given aircraft_id.
-    Uses safe_delete and cleans up the manifest DB after each file.
-    Deletes from deepest path to top to ensure folders are empty.
+
+    Builds the plan from one manifest query: files are grouped by the folder
+    they sit in directly under the preset folder, each group is unlinked on
+    DELETE_WORKERS threads. Tracked folders, and the folders the deleted files
+    sat in, are then removed deepest first in one pass; os.rmdir leaves folders
+    that still hold something alone. Manifest rows of everything that is gone
+    are removed in one transaction, rows of paths that failed stay.
+
+    update_callback(text, action=, done=, error=, folder=) is called per group,
+    the same shape process_deletes uses for delete_status_screen.
+    Returns (removed paths, failed paths).
     """
-    files_to_delete = manifest.list_files(aircraft_id)  # returns list of (file_path, added_at)
-    
-    # Sort by path depth, deepest first
-    files_to_delete.sort(key=lambda x: x[0].count(os.sep), reverse=True)
+    rows = manifest.list_files(aircraft_id)  # returns list of (file_path, added_at)
+    working_folder = None
+    if aircraft_id in aircrafts:
+        working_folder = os.path.normpath(os.path.join(liveries_folder, aircrafts[aircraft_id]["folder"]))
+
+    def inside_working_folder(path):
+        return working_folder is not None and path.startswith(working_folder + os.sep)
+
+    def group_of(path):
+        if inside_working_folder(path):
+            return os.path.relpath(path, working_folder).split(os.sep)[0]
+        return os.path.dirname(path)
+
+    prune = set() # folders to try removing once the files are gone
+    def add_parents(path):
+        # never above, or including, the preset folder
+        while inside_working_folder(path) and path not in prune:
+            prune.add(path)
+            path = os.path.dirname(path)
+
+    # Step 1: sort rows into files per group and tracked folders, one lstat each
+    groups = defaultdict(list)
+    tracked_folders = {} # normalized path -> path as stored in the manifest
+    removed = []
+    failed = []
+    for file_path, _ in rows:
+        path = os.path.normpath(file_path)
+        try:
+            is_folder = stat.S_ISDIR(os.lstat(path).st_mode)
+        except FileNotFoundError:
+            removed.append(file_path) # already gone, only the row is left
+            continue
+        except OSError as e:
+            log_error(f"Failed to delete {file_path}: {e}")
+            failed.append(file_path)
+            continue
+        if is_folder:
+            tracked_folders[path] = file_path
+            prune.add(path)
+            add_parents(os.path.dirname(path))
+        else:
+            groups[group_of(path)].append(file_path)
+            add_parents(os.path.dirname(path))
+
+    def unlink(file_path):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        return file_path
+
+    # Step 2: unlink files, a group at a time so progress reads per livery folder
+    with ThreadPoolExecutor(max_workers=DELETE_WORKERS, thread_name_prefix="delete") as pool:
+        for group, files in sorted(groups.items()):
+            if update_callback:
+                update_callback(f"'{group}'", action="delete", folder=group, done=False)
+            futures = {pool.submit(unlink, file_path): file_path for file_path in files}
+            errors = []
+            for future in as_completed(futures):
+                try:
+                    removed.append(future.result())
+                except OSError as e:
+                    log_error(f"Failed to delete {futures[future]}: {e}")
+                    failed.append(futures[future])
+                    errors.append(e)
+            log_info(f"Deleted {len(files) - len(errors)}/{len(files)} files in '{group}'", tag="UNINSTALL")
+            if update_callback:
+                if errors:
+                    update_callback(f"'{group}': {len(errors)} files failed, {errors[0]}", folder=group, error=True)
+                else:
+                    update_callback(f"'{group}'", action="delete", folder=group, done=True)
 
-    for file_path, _ in files_to_delete:
+    # Step 3: remove folders deepest first, anything not empty stays
+    for folder in sorted(prune, key=lambda path: path.count(os.sep), reverse=True):
         try:
-            # Delete the file/folder using safe_delete
-            safe_delete(file_path, force_delete=False)
+            os.rmdir(folder)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            if folder in tracked_folders:
+                log_warn(f"Folder not removed, it is not empty: {folder} ({e})", tag="UNINSTALL")
+                failed.append(tracked_folders[folder])
+            continue
+        if folder in tracked_folders:
+            removed.append(tracked_folders[folder])
+
+    # Step 4: drop the rows of everything that is gone, one transaction
+    manifest.remove_files(aircraft_id, removed)
+    log_info(f"Uninstalled {len(removed)} paths for '{aircraft_id}', {len(failed)} failed", tag="UNINSTALL")
+    return removed, failed
+
+
+def _file_checksums(path):
+    """(md5 hex, crc32) of a file, read once."""
+    md5 = hashlib.md5()
+    crc32 = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(EXTRACT_CHUNK_SIZE):
+            md5.update(chunk)
+            crc32 = zlib.crc32(chunk, crc32)
+    return md5.hexdigest(), crc32
+
 
-            # Remove the entry from manifest DB
-            manifest.remove_file(aircraft_id, file_path)
+def tracked_files(aircraft_id):
+    """
+    The manifest rows of a preset that stand for installed files, in get_file_signatures() form.
+    Rows recorded before sizes were kept have no size, they are told apart from
+    folders and downloaded zips by the disk and the other rows: a folder on disk,
+    a path other rows sit under, or a missing path without an extension is a
+    folder; '.zip' rows are the downloads.
+    """
+    rows = manifest.get_file_records(aircraft_id)
+    parents = set()
+    for row in rows:
+        parent = os.path.dirname(os.path.abspath(row[0]))
+        while parent not in parents and os.path.dirname(parent) != parent:
+            parents.add(parent)
+            parent = os.path.dirname(parent)
+
+    files = []
+    for row in rows:
+        if row[1] is None:
+            path = os.path.abspath(row[0])
+            if (path in parents or os.path.isdir(path) or path.lower().endswith(".zip")
+                    or (not os.path.splitext(path)[1] and not os.path.exists(path))):
+                continue
+        files.append(row)
+    return files
 
-            log_info(f"Deleted: {file_path}")
 
+def scan_drift(aircraft_id, verify=True):
+    """
+    Compare a preset's installed files with what the manifest recorded, like a status command.
+
+    The preset folder is walked once with os.scandir and every tracked file is
+    judged on that stat data alone:
+    - missing: tracked but not on disk
+    - modified: the size differs, or its content no longer matches
+    - extra: under the preset folder but not tracked
+    - unknown: tracked and on disk, but recorded before sizes were kept, so
+      there is nothing to judge it by
+    A file of the right size whose mtime or inode changed, or that was recorded
+    before stat values were kept, is suspicious. With verify it is hashed and
+    compared with the recorded md5, or the zip CRC when there is no md5. A match
+    counts as unchanged and its new stat values are stored so the next scan
+    skips it; files with nothing to compare against stay suspicious.
+    Returns {"missing": [...], "modified": [...], "suspicious": [...], "extra": [...],
+    "unknown": [...], "unchanged": count, "hashed": count}
+    """
+    working_folder = os.path.abspath(get_working_folder(aircraft_id))
+    check_inode = os.name != "nt" # free from scandir on POSIX, an extra call per file on Windows
+
+    on_disk = {} # path -> (size, mtime_ns, inode)
+    folders = [working_folder]
+    while folders:
+        try:
+            with os.scandir(folders.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        on_disk[entry.path] = (st.st_size, st.st_mtime_ns, entry.inode() if check_inode else None)
         except FileNotFoundError:
-            # File already missing, remove entry from manifest anyway
-            manifest.remove_file(aircraft_id, file_path)
-            log_error(f"File not found, removed manifest entry: {file_path}")
+            continue
+
+    report = {"missing": [], "modified": [], "suspicious": [], "extra": [], "unknown": [], "unchanged": 0, "hashed": 0}
+    # everything in the manifest is tracked, folders, zips and rows of older installs too
+    tracked = {os.path.abspath(file_path) for file_path, _ in manifest.list_files(aircraft_id)}
+    refreshed = []
+    for file_path, file_size, mtime_ns, inode, file_hash, crc32, _ in tracked_files(aircraft_id):
+        path = os.path.abspath(file_path)
+        disk = on_disk.get(path)
+        if disk is None:
+            report["missing"].append(file_path)
+            continue
+        if file_size is None:
+            report["unknown"].append(file_path)
+            continue
+        size, disk_mtime_ns, disk_inode = disk
+        if size != file_size:
+            report["modified"].append(file_path)
+            continue
+        if mtime_ns == disk_mtime_ns and (not check_inode or inode is None or inode == disk_inode):
+            report["unchanged"] += 1
+            continue
+
+        # same size but touched, only the content can tell
+        if not verify or not (file_hash or crc32 is not None):
+            report["suspicious"].append(file_path)
+            continue
+        try:
+            md5, disk_crc32 = _file_checksums(path)
+        except OSError as e:
+            log_warn(f"Could not read '{file_path}': {e}", tag="DRIFT")
+            report["suspicious"].append(file_path)
+            continue
+        report["hashed"] += 1
+        if (file_hash and md5 != file_hash) or (not file_hash and disk_crc32 != crc32):
+            report["modified"].append(file_path)
+        else:
+            report["unchanged"] += 1
+            refreshed.append((file_path, *_stat_signature(path)))
+
+    report["extra"] = sorted(path for path in on_disk if path not in tracked)
+    if refreshed:
+        manifest.update_signatures(aircraft_id, refreshed)
+    log_info(f"Drift scan of '{aircraft_id}': {report['unchanged']} unchanged, {len(report['modified'])} modified, "
+             f"{len(report['missing'])} missing, {len(report['suspicious'])} suspicious, {len(report['extra'])} extra, "
+             f"{len(report['unknown'])} unknown, "
+             f"{report['hashed']} hashed", tag="DRIFT")
+    return report
+
+
+def verify_full_enabled():
+    """True if program config 'verify_full' asks verify_installation to read every file."""
+    return bool(config.get("program", {}).get("verify_full", False))
+
+
+def verify_installation(aircraft_id, update_callback=None, full=None):
+    """
+    Check every installed file of a preset against its recorded checksums.
+
+    Unless full (default: program config 'verify_full'), scan_drift first sorts
+    out the files whose size, mtime and inode are what was recorded at install,
+    they count as checked without being read. The rest are read on
+    get_extract_workers() threads, md5 and zlib release the GIL so hashing scales
+    with the cores. Each file is compared with its md5 from the manifest, else
+    the CRC-32 from the server's zip, and a missing file or wrong size fails
+    without being read. Files that match get their stat values refreshed, so the
+    next quick check skips them. Files from installs before sizes were recorded
+    are hashed when they have an md5, otherwise only checked to exist.
+
+    update_callback(text, file=, action="verify", done=, error=) is called once
+    a zip's files have all been checked, the shape download_status_screen uses.
+    Returns {"checked": files, "skipped": files not read, "bytes": read, "seconds": elapsed,
+    "bytes_per_second": ..., "damaged": {zip: [paths]}, "unrepairable": [paths], "unverifiable": [paths]}.
+    Files recorded without a zip cannot be fetched again and are unrepairable,
+    files without any checksum are unverifiable.
+    """
+    if full is None:
+        full = verify_full_enabled()
+    start_time = time.time()
+    rows = tracked_files(aircraft_id)
+    if not full:
+        drift = scan_drift(aircraft_id, verify=False)
+        flagged = set(drift["missing"]) | set(drift["modified"]) | set(drift["suspicious"]) | set(drift["unknown"])
+    by_zip = defaultdict(list)
+    to_read = []
+    for row in rows:
+        by_zip[row[6]].append(row)
+        if full or row[0] in flagged:
+            to_read.append(row)
+
+    def check(row):
+        file_path, file_size, _, _, file_hash, crc32, _ = row
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            return file_path, False, 0
+        if file_size is not None and size != file_size:
+            return file_path, False, 0
+        if not file_hash and crc32 is None:
+            return file_path, None, 0
+        try:
+            md5, disk_crc32 = _file_checksums(file_path)
+        except OSError as e:
+            log_warn(f"Could not read '{file_path}': {e}", tag="VERIFY")
+            return file_path, False, 0
+        matches = md5 == file_hash if file_hash else disk_crc32 == crc32
+        return file_path, matches, size
+
+    report = {"checked": len(rows) - len(to_read), "skipped": len(rows) - len(to_read), "bytes": 0, "seconds": 0,
+              "bytes_per_second": None, "damaged": defaultdict(list), "unrepairable": [], "unverifiable": []}
+    remaining = defaultdict(int)
+    for row in to_read:
+        remaining[row[6]] += 1
+
+    def zip_checked(source_zip):
+        label = source_zip or "Files without a source zip"
+        damaged = len(report["damaged"].get(source_zip, []))
+        if damaged:
+            update_callback(f"{label} - {damaged} damaged", file=label, action="verify", error=True)
+        else:
+            update_callback(f"{label} - OK", file=label, action="verify", done=True)
+
+    if update_callback:
+        # zips with nothing to read are done already
+        for source_zip in by_zip:
+            if not remaining[source_zip]:
+                zip_checked(source_zip)
+
+    refreshed = []
+    with ThreadPoolExecutor(max_workers=get_extract_workers(), thread_name_prefix="verify") as pool:
+        # submitted zip by zip, so zips finish roughly in order while the pool stays full
+        futures = {pool.submit(check, row): row[6] for row in to_read}
+        for future in as_completed(futures):
+            source_zip = futures[future]
+            file_path, matches, read = future.result()
+            report["checked"] += 1
+            report["bytes"] += read
+            if matches is None:
+                log_info(f"No checksum recorded, only checked it exists: {file_path}", tag="VERIFY")
+                report["unverifiable"].append(file_path)
+            elif matches:
+                refreshed.append((file_path, *_stat_signature(file_path)))
+            else:
+                log_warn(f"Damaged or missing: {file_path}", tag="VERIFY")
+                if source_zip:
+                    report["damaged"][source_zip].append(file_path)
+                else:
+                    report["unrepairable"].append(file_path)
+
+            remaining[source_zip] -= 1
+            if update_callback and not remaining[source_zip]:
+                zip_checked(source_zip)
+
+    if refreshed:
+        manifest.update_signatures(aircraft_id, refreshed)
+    report["seconds"] = time.time() - start_time
+    if report["seconds"] > 0:
+        report["bytes_per_second"] = report["bytes"] / report["seconds"]
+    report["damaged"] = dict(report["damaged"])
+    damaged_files = sum(len(paths) for paths in report["damaged"].values())
+    rate = f", {report['bytes_per_second']:.0f} bytes/s" if report["bytes_per_second"] else ""
+    log_info(f"Verified {report['checked']} files of '{aircraft_id}' ({report['skipped']} unchanged since install, not read), "
+             f"{report['bytes']} bytes in {report['seconds']:.2f} seconds{rate}: "
+             f"{damaged_files} damaged in {len(report['damaged'])} zips, {len(report['unrepairable'])} unrepairable, "
+             f"{len(report['unverifiable'])} unverifiable", tag="VERIFY")
+    return report
+
+
+def prepare_repair(report):
+    """
+    The downloads that repair the damaged files of a verify_installation report.
+    Returns (zips, file_info) for process_downloads, file_info lists each zip's
+    damaged files under 'repair' so a partial update fetches them even though the
+    manifest still holds their good checksums. The manifest only changes once a
+    repaired file was written, a failed repair is found damaged again next time.
+    """
+    zips = sorted(report["damaged"])
+    return zips, {file: {"repair": report["damaged"][file]} for file in zips}
 
-        except Exception as e:
-            log_error(f"Failed to delete {file_path}: {e}")
-          
 
 def delete_preset(preset_id):
     """
@@ -975,7 +2558,7 @@ def is_update_available(current_version: str) -> bool:
     """Check if a newer version exists in the latest_version.txt file."""
     url = "https://raw.githubusercontent.com/itsdotbmp/AERIS/refs/heads/master/main/current_release.txt"
     try:
-        with urllib.request.urlopen(url, timeout=5) as response:
+        with http_client.urlopen(url, timeout=5) as response:
             latest_version = response.read().decode("utf-8").strip()
             latest_version = latest_version.strip().splitlines()[0]
 
@@ -1056,6 +2639,7 @@ try:
         handlers=[logging_handler]
     )
     manifest.init_db(base_dir)
+    http_cache_dir = os.path.join(base_dir, "http_cache")
     
 
     try:
@@ -1,17 +1,40 @@
+"""
+Manifest of every file AERIS installed, per aircraft preset.
+
+Connections live as long as the process: one writer shared by every thread and
+serialized by a lock, plus one reader per thread. Reads never wait for a write
+in WAL mode, and each connection keeps its prepared statements cached, so hot
+paths only pay for the query itself. close_all() runs at shutdown.
+"""
+
 import sqlite3
-from contextlib import closing
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 import hashlib
+import json
 import os
 
 MANIFEST_DB_PATH = None
+STATEMENT_CACHE_SIZE = 256
+INSERT_FILE_SQL = "INSERT OR REPLACE INTO files (aircraft_id, file_path, added_at, file_hash, crc32, file_size, source_zip, mtime_ns, inode) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+_writer = None
+_write_lock = threading.RLock()
+_readers = {} # thread -> its reader connection
+_readers_lock = threading.Lock()
+_local = threading.local()
 
 def init_db(base_dir):
     """Initialize the manifest DB and create the table if needed."""
     global MANIFEST_DB_PATH
+    close_all() # connections to a previously loaded manifest
     MANIFEST_DB_PATH = os.path.join(base_dir, "manifest")
 
-    with sqlite3.connect(MANIFEST_DB_PATH) as conn:
+    with transaction() as conn:
+        # write ahead log: a commit appends to the log instead of rewriting pages,
+        # and readers are not blocked while an update is recording files
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("""
         CREATE TABLE IF NOT EXISTS files (
             aircraft_id TEXT NOT NULL,
@@ -22,6 +45,13 @@ def init_db(base_dir):
         )
         """)
 
+        # columns added after the first release, older manifests are migrated in place
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+        for name, column_type in (("crc32", "INTEGER"), ("file_size", "INTEGER"), ("source_zip", "TEXT"),
+                                  ("mtime_ns", "INTEGER"), ("inode", "INTEGER")):
+            if name not in columns:
+                conn.execute(f"ALTER TABLE files ADD COLUMN {name} {column_type} DEFAULT NULL")
+
         # Table for aircraft_id preset version tracking
         conn.execute("""
         CREATE TABLE IF NOT EXISTS aircraft_preset_versions (
@@ -31,70 +61,230 @@ def init_db(base_dir):
             metadata TEXT DEFAULT NULL
         )
         """)
-        
-        conn.commit()
+
+
+def _connect() -> sqlite3.Connection:
+    # check_same_thread is off so close_all() can close every connection,
+    # each one is still only used by its owner thread or under _write_lock
+    conn = sqlite3.connect(MANIFEST_DB_PATH, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    # with WAL, NORMAL only syncs at checkpoints, a power cut can lose the last
+    # commits but never corrupts the database
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@contextmanager
+def transaction():
+    """
+    Hold the writer connection for one transaction.
+    Commits when the block ends, rolls back if it raises. Other writers wait,
+    readers do not. Nested use on the same thread joins the outer transaction.
+    """
+    global _writer
+    with _write_lock:
+        if _writer is None:
+            _writer = _connect()
+        if getattr(_local, "in_transaction", False):
+            yield _writer
+            return
+        _local.in_transaction = True
+        try:
+            with _writer:
+                yield _writer
+        finally:
+            _local.in_transaction = False
+
+
+def _reader() -> sqlite3.Connection:
+    """The calling thread's read connection, opened on first use."""
+    thread = threading.current_thread()
+    with _readers_lock:
+        conn = _readers.get(thread)
+        if conn is None:
+            # worker threads come and go, close what finished ones left behind
+            for finished in [t for t in _readers if not t.is_alive()]:
+                _readers.pop(finished).close()
+            conn = _readers[thread] = _connect()
+    return conn
+
+
+def close_all():
+    """Close the writer and every reader connection, they reopen on next use."""
+    global _writer
+    with _write_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+    with _readers_lock:
+        for conn in _readers.values():
+            conn.close()
+        _readers.clear()
 
 
 def get_conn() -> sqlite3.Connection:
-    """Open and return a persistent connection to the manifest DB."""
-    return sqlite3.connect(MANIFEST_DB_PATH)
+    """
+    Open a separate connection to the manifest DB, close it with close_conn().
+    Only for callers that need one of their own, every function here uses the
+    shared connections when no conn is passed.
+    """
+    return _connect()
 
 
 def close_conn(conn: sqlite3.Connection):
-    """Close previously opened manifest DB connection."""
+    """Close a connection opened with get_conn()."""
     conn.close()
 
 
-def add_file(aircraft_id: str, file_path: str, file_hash: str = None, conn: sqlite3.Connection = None):
-    """Add a file entry to the manifest."""
-    own_conn = False
-    if conn is None:
-        conn = sqlite3.connect(MANIFEST_DB_PATH)
-        own_conn = True
-    
-    conn.execute(
-        "INSERT OR REPLACE INTO files (aircraft_id, file_path, added_at, file_hash) VALUES (?, ?, ?, ?)",
-        (aircraft_id, file_path, datetime.now(), file_hash)
-    )
-    conn.commit()
-    if own_conn:
-        conn.close()
+def add_file(aircraft_id: str, file_path: str, file_hash: str = None, conn: sqlite3.Connection = None,
+             crc32: int = None, file_size: int = None, source_zip: str = None,
+             mtime_ns: int = None, inode: int = None):
+    """
+    Add a file entry to the manifest.
+    crc32 and file_size are the zip member's values, source_zip the zip it came from.
+    mtime_ns and inode are the file's stat values once written, for drift checks.
+    Commits right away, use add_files() for more than a handful of rows.
+    """
+    values = (aircraft_id, file_path, datetime.now(), file_hash, crc32, file_size, source_zip, mtime_ns, inode)
+    if conn is not None:
+        conn.execute(INSERT_FILE_SQL, values)
+        conn.commit()
+        return
+    with transaction() as writer:
+        writer.execute(INSERT_FILE_SQL, values)
+
+
+def add_files(aircraft_id: str, entries, conn: sqlite3.Connection = None):
+    """
+    Add many file and folder entries to the manifest in one transaction.
+    entries are (file_path, file_hash, crc32, file_size, source_zip, mtime_ns, inode)
+    tuples, folders leave everything after the path as None.
+    """
+    now = datetime.now()
+    rows = [(aircraft_id, file_path, now, *values) for file_path, *values in entries]
+    if conn is not None:
+        with conn: # commits once at the end, rolls back if a row fails
+            conn.executemany(INSERT_FILE_SQL, rows)
+        return
+    with transaction() as writer:
+        writer.executemany(INSERT_FILE_SQL, rows)
 
 
 def add_folder(aircraft_id: str, file_path: str, conn: sqlite3.Connection = None):
     """Add a folder entry to the manifest."""
-    own_conn = False
-    if conn is None:
-        conn = sqlite3.connect(MANIFEST_DB_PATH)
-        own_conn = True
-    
-    conn.execute(
-        "INSERT OR REPLACE INTO files (aircraft_id, file_path, added_at) VALUES (?, ?, ?)",
-        (aircraft_id, file_path, datetime.now())
-    )
-    conn.commit()
-    if own_conn:
-        conn.close()
+    add_file(aircraft_id, file_path, conn=conn)
 
 
 def remove_file(aircraft_id: str, file_path: str, file_hash: str = None):
     """Remove a file entry from the database."""
-    with sqlite3.connect(MANIFEST_DB_PATH) as conn:
+    with transaction() as conn:
         conn.execute(
             "DELETE FROM files WHERE aircraft_id=? AND file_path=?",
             (aircraft_id, file_path)
         )
-        conn.commit()
+
+
+def remove_files(aircraft_id: str, file_paths):
+    """Remove many file entries from the database in one transaction."""
+    with transaction() as conn:
+        conn.executemany(
+            "DELETE FROM files WHERE aircraft_id=? AND file_path=?",
+            ((aircraft_id, file_path) for file_path in file_paths)
+        )
 
 
 def list_files(aircraft_id: str):
     """List all files tracked for a given aircraft preset."""
-    with sqlite3.connect(MANIFEST_DB_PATH) as conn:
-        cur = conn.execute(
-            "SELECT file_path, added_at FROM files WHERE aircraft_id=?",
+    cur = _reader().execute(
+        "SELECT file_path, added_at FROM files WHERE aircraft_id=?",
+        (aircraft_id,)
+    )
+    return cur.fetchall()
+
+
+def get_preset_metadata(aircraft_id: str) -> dict:
+    """Return the metadata stored for an aircraft preset, an empty dict if there is none."""
+    row = _reader().execute(
+        "SELECT metadata FROM aircraft_preset_versions WHERE aircraft_id=?",
+        (aircraft_id,)
+    ).fetchone()
+    if not row or not row[0]:
+        return {}
+    try:
+        return json.loads(row[0])
+    except ValueError:
+        return {}
+
+
+def update_preset_metadata(aircraft_id: str, **values):
+    """Merge values into the metadata stored for an aircraft preset."""
+    with transaction() as conn:
+        # read on the writer so two updates cannot drop each other's keys
+        row = conn.execute(
+            "SELECT metadata FROM aircraft_preset_versions WHERE aircraft_id=?",
             (aircraft_id,)
+        ).fetchone()
+        try:
+            metadata = json.loads(row[0]) if row and row[0] else {}
+        except ValueError:
+            metadata = {}
+        metadata.update(values)
+        conn.execute(
+            """INSERT INTO aircraft_preset_versions (aircraft_id, last_updated, metadata) VALUES (?, ?, ?)
+            ON CONFLICT(aircraft_id) DO UPDATE SET metadata=excluded.metadata""",
+            (aircraft_id, datetime.now(), json.dumps(metadata))
+        )
+
+
+def get_zip_members(aircraft_id: str, source_zip: str) -> dict:
+    """Files extracted from source_zip with their recorded member values, {file_path: (crc32, file_size)}."""
+    cur = _reader().execute(
+        "SELECT file_path, crc32, file_size FROM files WHERE aircraft_id=? AND source_zip=? AND crc32 IS NOT NULL",
+        (aircraft_id, source_zip)
+    )
+    return {file_path: (crc32, file_size) for file_path, crc32, file_size in cur.fetchall()}
+
+
+def get_file_signatures(aircraft_id: str):
+    """
+    Installed files of a preset with what is known about them,
+    [(file_path, file_size, mtime_ns, inode, file_hash, crc32, source_zip)].
+    Folders and rows without a size (zips, legacy rows) are left out.
+    """
+    cur = _reader().execute(
+        "SELECT file_path, file_size, mtime_ns, inode, file_hash, crc32, source_zip FROM files WHERE aircraft_id=? AND file_size IS NOT NULL",
+        (aircraft_id,)
+    )
+    return cur.fetchall()
+
+
+def get_file_records(aircraft_id: str):
+    """
+    Every row of a preset with what is known about it, same columns as get_file_signatures().
+    Includes folders, downloaded zips and rows recorded before sizes were kept.
+    """
+    cur = _reader().execute(
+        "SELECT file_path, file_size, mtime_ns, inode, file_hash, crc32, source_zip FROM files WHERE aircraft_id=?",
+        (aircraft_id,)
+    )
+    return cur.fetchall()
+
+
+def update_signatures(aircraft_id: str, signatures):
+    """Store new (file_path, mtime_ns, inode) stat values for files whose content was found unchanged."""
+    with transaction() as conn:
+        conn.executemany(
+            "UPDATE files SET mtime_ns=?, inode=? WHERE aircraft_id=? AND file_path=?",
+            ((mtime_ns, inode, aircraft_id, file_path) for file_path, mtime_ns, inode in signatures)
         )
-        return cur.fetchall()
+
+
+def get_file_hash(aircraft_id: str, file_path: str) -> str:
+    """The md5 recorded for a file, None if the file is not tracked or was recorded without one."""
+    row = _reader().execute(
+        "SELECT file_hash FROM files WHERE aircraft_id=? AND file_path=?",
+        (aircraft_id, file_path)
+    ).fetchone()
+    return row[0] if row else None
 
 
 def compute_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
@@ -111,4 +301,4 @@ def compute_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
         raise FileNotFoundError(f"File not found for hashing: {file_path}")
     except Exception as e:
         raise RuntimeError(f"Error hashing file '{file_path}': {e}")
-    return md5.hexdigest()
\ No newline at end of file
+    return md5.hexdigest()
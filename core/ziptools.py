@@ -0,0 +1,364 @@
+"""
+Low level zip helpers that work without zipfile.ZipFile.
+
+iter_stream_members() walks the local file headers of a zip as it arrives on
+a non-seekable stream (eg. an HTTP response), so members can be written to
+disk without the zip ever being saved. Archives that can only be read through
+the central directory raise StreamingUnsupported, callers then fall back to
+downloading the zip and using zipfile as usual.
+
+read_central_directory() lists a remote zip's members from a couple of range
+reads of its tail, so single members can be fetched by their byte range.
+
+copy_stored_member() copies an uncompressed member straight out of a local
+archive, inside the kernel where the platform allows it.
+"""
+
+import errno
+import os
+import struct
+import zlib
+import zipfile
+
+LOCAL_HEADER_SIGNATURE = 0x04034b50
+CENTRAL_HEADER_SIGNATURE = 0x02014b50
+END_OF_CENTRAL_DIR_SIGNATURE = 0x06054b50
+ZIP64_END_OF_CENTRAL_DIR_SIGNATURE = 0x06064b50
+ZIP64_END_OF_CENTRAL_DIR_LOCATOR_SIGNATURE = 0x07064b50
+DATA_DESCRIPTOR_SIGNATURE = 0x08074b50
+LOCAL_HEADER_FORMAT = "<IHHHHHIIIHH"
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+CENTRAL_HEADER_FORMAT = "<IHHHHHHIIIHHHHHII"
+CENTRAL_HEADER_SIZE = struct.calcsize(CENTRAL_HEADER_FORMAT)
+END_OF_CENTRAL_DIR_FORMAT = "<IHHHHIIH"
+END_OF_CENTRAL_DIR_SIZE = struct.calcsize(END_OF_CENTRAL_DIR_FORMAT)
+ZIP64_LOCATOR_FORMAT = "<IIQI"
+ZIP64_LOCATOR_SIZE = struct.calcsize(ZIP64_LOCATOR_FORMAT)
+ZIP64_END_OF_CENTRAL_DIR_FORMAT = "<IQHHIIQQQQ"
+ZIP64_END_OF_CENTRAL_DIR_SIZE = struct.calcsize(ZIP64_END_OF_CENTRAL_DIR_FORMAT)
+MAX_COMMENT_SIZE = 0xFFFF
+ZIP64_EXTRA_ID = 0x0001
+FLAG_ENCRYPTED = 0x1
+FLAG_DATA_DESCRIPTOR = 0x8
+FLAG_UTF8 = 0x800
+CHUNK_SIZE = 1024 * 1024
+STORED_COPY_SIZE = 8 * 1024 * 1024
+# errors meaning this platform or file system cannot copy between these files in the kernel
+KERNEL_COPY_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EBADF, errno.ENOTSUP, errno.EOPNOTSUPP, errno.ENOTSOCK}
+
+
+class StreamingUnsupported(Exception):
+    """The archive cannot be extracted from a stream, download it and use zipfile instead."""
+    pass
+
+
+class _StreamReader:
+    """Buffered reader over a stream that can give back bytes it read too far."""
+    def __init__(self, stream):
+        self._stream = stream
+        self._buffer = b""
+
+    def read_some(self, size=CHUNK_SIZE):
+        if self._buffer:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+            return data
+        return self._stream.read(size)
+
+    def read_exact(self, size):
+        parts = []
+        while size > 0:
+            data = self.read_some(size)
+            if not data:
+                raise zipfile.BadZipFile("Unexpected end of zip stream")
+            parts.append(data)
+            size -= len(data)
+        return b"".join(parts)
+
+    def push_back(self, data):
+        self._buffer = data + self._buffer
+
+
+class StreamMember:
+    """Local header details of one member of a zip stream."""
+    def __init__(self, filename, method, flags, crc, compress_size, file_size):
+        self.filename = filename
+        self.method = method
+        self.flags = flags
+        self.crc = crc
+        self.compress_size = compress_size
+        self.file_size = file_size
+
+    def is_dir(self):
+        return self.filename.endswith("/")
+
+
+class CentralMember(StreamMember):
+    """
+    Central directory entry of a zip member.
+    - header_offset : where its local header starts
+    - data_end : last byte of its local header, data and data descriptor (inclusive)
+    """
+    def __init__(self, filename, method, flags, crc, compress_size, file_size, header_offset):
+        super().__init__(filename, method, flags, crc, compress_size, file_size)
+        self.header_offset = header_offset
+        self.data_end = None
+
+
+def _extra_fields(extra):
+    """Split a zip extra field into {header_id: data}."""
+    fields = {}
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack("<HH", extra[pos:pos + 4])
+        fields[header_id] = extra[pos + 4:pos + 4 + size]
+        pos += 4 + size
+    return fields
+
+
+def _zip64_sizes(extra, file_size, compress_size):
+    """Replace 0xFFFFFFFF sizes with the values from the zip64 extra field."""
+    data = _extra_fields(extra).get(ZIP64_EXTRA_ID) or b""
+    values = list(struct.unpack(f"<{len(data) // 8}Q", data[:len(data) // 8 * 8]))
+    if file_size == 0xFFFFFFFF and values:
+        file_size = values.pop(0)
+    if compress_size == 0xFFFFFFFF and values:
+        compress_size = values.pop(0)
+    return file_size, compress_size
+
+
+def _read_data_descriptor(reader, zip64):
+    size_format = "<QQ" if zip64 else "<II"
+    first = reader.read_exact(4)
+    if struct.unpack("<I", first)[0] == DATA_DESCRIPTOR_SIGNATURE:
+        first = reader.read_exact(4)
+    crc = struct.unpack("<I", first)[0]
+    compress_size, file_size = struct.unpack(size_format, reader.read_exact(struct.calcsize(size_format)))
+    return crc, compress_size, file_size
+
+
+def _copy_member(reader, member, zip64, write):
+    """Decompress one member's data from reader into write(), checking its CRC."""
+    crc = 0
+    if member.method == zipfile.ZIP_STORED:
+        remaining = member.compress_size
+        while remaining:
+            data = reader.read_some(min(CHUNK_SIZE, remaining))
+            if not data:
+                raise zipfile.BadZipFile(f"Unexpected end of zip stream in '{member.filename}'")
+            remaining -= len(data)
+            crc = zlib.crc32(data, crc)
+            write(data)
+    else:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        # without a data descriptor we know exactly how much to read
+        remaining = None if member.flags & FLAG_DATA_DESCRIPTOR else member.compress_size
+        while not decompressor.eof:
+            size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+            data = reader.read_some(size) if size else b""
+            if not data:
+                raise zipfile.BadZipFile(f"Unexpected end of zip stream in '{member.filename}'")
+            if remaining is not None:
+                remaining -= len(data)
+            output = decompressor.decompress(data)
+            crc = zlib.crc32(output, crc)
+            write(output)
+        if decompressor.unused_data:
+            reader.push_back(decompressor.unused_data)
+
+    if member.flags & FLAG_DATA_DESCRIPTOR:
+        member.crc, member.compress_size, member.file_size = _read_data_descriptor(reader, zip64)
+
+    if crc != member.crc:
+        raise zipfile.BadZipFile(f"Bad CRC-32 for file '{member.filename}'")
+
+
+def is_plain_stored(info):
+    """True if a zipfile.ZipInfo's data sits in the archive as is: stored and not encrypted."""
+    return info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & FLAG_ENCRYPTED
+
+
+def copy_stored_member(source, info, target, buffer_size=STORED_COPY_SIZE):
+    """
+    Copy a stored member's data from source, the archive opened unbuffered, to the file target.
+    The kernel copies the bytes (copy_file_range, else sendfile) without them passing
+    through Python, so nothing checks them against the member's CRC here: callers
+    record the zip's CRC as the file's checksum instead. Where neither call works
+    (Windows, macOS, file systems without support) the bytes are read through one
+    reused buffer and their CRC is checked.
+    """
+    offset = _stored_data_offset(source, info)
+    if _kernel_copy(source.fileno(), target.fileno(), offset, info.file_size):
+        return
+
+    source.seek(offset)
+    view = memoryview(bytearray(min(buffer_size, info.file_size) or 1))
+    crc = 0
+    remaining = info.file_size
+    while remaining:
+        read = source.readinto(view[:min(len(view), remaining)])
+        if not read:
+            raise zipfile.BadZipFile(f"Unexpected end of zip in '{info.filename}'")
+        chunk = view[:read]
+        crc = zlib.crc32(chunk, crc)
+        target.write(chunk)
+        remaining -= read
+
+    if crc != info.CRC:
+        raise zipfile.BadZipFile(f"Bad CRC-32 for file '{info.filename}'")
+
+
+def _stored_data_offset(f, info):
+    """Where a member's data starts, after its local header (whose extra field can differ from the central one)."""
+    f.seek(info.header_offset)
+    header = f.read(LOCAL_HEADER_SIZE)
+    if len(header) != LOCAL_HEADER_SIZE:
+        raise zipfile.BadZipFile(f"Truncated local header for '{info.filename}'")
+    fields = struct.unpack(LOCAL_HEADER_FORMAT, header)
+    if fields[0] != LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local header for '{info.filename}'")
+    name_length, extra_length = fields[9], fields[10]
+    return info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+
+
+def _kernel_copy(source_fd, target_fd, offset, size):
+    """
+    Copy size bytes at offset of source_fd to target_fd's position inside the kernel.
+    Returns False if the platform or file system cannot, before anything was written.
+    """
+    for name in ("copy_file_range", "sendfile"):
+        if not hasattr(os, name):
+            continue
+        done = 0
+        try:
+            while done < size:
+                if name == "copy_file_range":
+                    copied = os.copy_file_range(source_fd, target_fd, size - done, offset + done)
+                else:
+                    copied = os.sendfile(target_fd, source_fd, offset + done, size - done)
+                if not copied:
+                    raise zipfile.BadZipFile("Unexpected end of zip")
+                done += copied
+            return True
+        except OSError as e:
+            if done or e.errno not in KERNEL_COPY_UNSUPPORTED:
+                raise
+    return False
+
+
+def iter_stream_members(stream):
+    """
+    Yield (member, extract) for each member of the zip arriving on stream.
+    Call extract(write) with a function taking bytes to receive the member's
+    decompressed data, members that are not extracted are skipped over.
+    Raises StreamingUnsupported for encrypted members, compression other than
+    STORED/DEFLATED, and STORED members whose size is only in the data descriptor.
+    """
+    reader = _StreamReader(stream)
+    while True:
+        signature_bytes = reader.read_some(4)
+        if not signature_bytes:
+            return
+        if len(signature_bytes) < 4:
+            signature_bytes += reader.read_exact(4 - len(signature_bytes))
+        signature = struct.unpack("<I", signature_bytes)[0]
+        if signature in (CENTRAL_HEADER_SIGNATURE, END_OF_CENTRAL_DIR_SIGNATURE):
+            return # every member has been read, the rest is the central directory
+        if signature != LOCAL_HEADER_SIGNATURE:
+            raise StreamingUnsupported(f"Unexpected zip signature {signature:#x}")
+
+        header = struct.unpack(LOCAL_HEADER_FORMAT, signature_bytes + reader.read_exact(LOCAL_HEADER_SIZE - 4))
+        _, _, flags, method, _, _, crc, compress_size, file_size, name_length, extra_length = header
+        raw_name = reader.read_exact(name_length)
+        extra = reader.read_exact(extra_length)
+        filename = raw_name.decode("utf-8" if flags & FLAG_UTF8 else "cp437")
+
+        # the data descriptor uses 8 byte sizes when a zip64 extra field is present
+        zip64 = _extra_fields(extra).get(ZIP64_EXTRA_ID) is not None
+        if compress_size == 0xFFFFFFFF or file_size == 0xFFFFFFFF:
+            file_size, compress_size = _zip64_sizes(extra, file_size, compress_size)
+
+        if flags & FLAG_ENCRYPTED:
+            raise StreamingUnsupported(f"Encrypted member '{filename}'")
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise StreamingUnsupported(f"Unsupported compression {method} for '{filename}'")
+        if method == zipfile.ZIP_STORED and flags & FLAG_DATA_DESCRIPTOR:
+            raise StreamingUnsupported(f"Stored member '{filename}' has no size before its data")
+
+        member = StreamMember(filename, method, flags, crc, compress_size, file_size)
+        extracted = False
+
+        def extract(write):
+            nonlocal extracted
+            extracted = True
+            _copy_member(reader, member, zip64, write)
+
+        yield member, extract
+        if not extracted:
+            _copy_member(reader, member, zip64, lambda data: None)
+
+
+def read_central_directory(read_range, total_size):
+    """
+    List the members of a zip that can only be read in pieces, eg. over HTTP ranges.
+    read_range(start, end) must return the bytes from start to end inclusive.
+    Handles zip64 archives. Returns a list of CentralMember in archive order,
+    each with its data_end set so read_range(header_offset, data_end) covers it.
+    Raises zipfile.BadZipFile if no central directory is found.
+    """
+    tail_start = max(0, total_size - END_OF_CENTRAL_DIR_SIZE - MAX_COMMENT_SIZE - ZIP64_LOCATOR_SIZE)
+    tail = read_range(tail_start, total_size - 1)
+    eocd_pos = tail.rfind(struct.pack("<I", END_OF_CENTRAL_DIR_SIGNATURE))
+    if eocd_pos < 0 or len(tail) - eocd_pos < END_OF_CENTRAL_DIR_SIZE:
+        raise zipfile.BadZipFile("End of central directory not found")
+    _, _, _, _, count, cd_size, cd_offset, _ = struct.unpack(
+        END_OF_CENTRAL_DIR_FORMAT, tail[eocd_pos:eocd_pos + END_OF_CENTRAL_DIR_SIZE])
+
+    if count == 0xFFFF or cd_size == 0xFFFFFFFF or cd_offset == 0xFFFFFFFF:
+        locator_pos = eocd_pos - ZIP64_LOCATOR_SIZE
+        if locator_pos < 0:
+            raise zipfile.BadZipFile("Zip64 end of central directory locator not found")
+        signature, _, zip64_eocd_offset, _ = struct.unpack(ZIP64_LOCATOR_FORMAT, tail[locator_pos:eocd_pos])
+        if signature != ZIP64_END_OF_CENTRAL_DIR_LOCATOR_SIGNATURE:
+            raise zipfile.BadZipFile("Zip64 end of central directory locator not found")
+        record = read_range(zip64_eocd_offset, zip64_eocd_offset + ZIP64_END_OF_CENTRAL_DIR_SIZE - 1)
+        fields = struct.unpack(ZIP64_END_OF_CENTRAL_DIR_FORMAT, record)
+        if fields[0] != ZIP64_END_OF_CENTRAL_DIR_SIGNATURE:
+            raise zipfile.BadZipFile("Bad zip64 end of central directory")
+        count, cd_size, cd_offset = fields[7], fields[8], fields[9]
+
+    # the directory often already sits in the tail that was read
+    if cd_offset >= tail_start:
+        directory = tail[cd_offset - tail_start:cd_offset - tail_start + cd_size]
+    else:
+        directory = read_range(cd_offset, cd_offset + cd_size - 1)
+
+    members = []
+    pos = 0
+    for _ in range(count):
+        header = struct.unpack(CENTRAL_HEADER_FORMAT, directory[pos:pos + CENTRAL_HEADER_SIZE])
+        signature, _, _, flags, method, _, _, crc, compress_size, file_size, name_length, extra_length, comment_length, _, _, _, header_offset = header
+        if signature != CENTRAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile("Bad central directory entry")
+        pos += CENTRAL_HEADER_SIZE
+        raw_name = directory[pos:pos + name_length]
+        extra = directory[pos + name_length:pos + name_length + extra_length]
+        pos += name_length + extra_length + comment_length
+
+        # zip64 extra field holds the values that did not fit, in this order
+        data = _extra_fields(extra).get(ZIP64_EXTRA_ID) or b""
+        values = list(struct.unpack(f"<{len(data) // 8}Q", data[:len(data) // 8 * 8]))
+        if file_size == 0xFFFFFFFF and values:
+            file_size = values.pop(0)
+        if compress_size == 0xFFFFFFFF and values:
+            compress_size = values.pop(0)
+        if header_offset == 0xFFFFFFFF and values:
+            header_offset = values.pop(0)
+
+        filename = raw_name.decode("utf-8" if flags & FLAG_UTF8 else "cp437")
+        members.append(CentralMember(filename, method, flags, crc, compress_size, file_size, header_offset))
+
+    # a member runs up to the next local header, the last one up to the directory
+    ordered = sorted(members, key=lambda member: member.header_offset)
+    for member, following in zip(ordered, ordered[1:] + [None]):
+        member.data_end = (following.header_offset if following else cd_offset) - 1
+    return members
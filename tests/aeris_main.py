@@ -0,0 +1,36 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+BASE_DIR = tempfile.mkdtemp()
+
+
+def _import_main():
+    """
+    Import core.main with its base dir in BASE_DIR. core.main writes its config,
+    manifest and log next to the program on import, frozen builds use the
+    executable's folder, which lets the tests point it somewhere disposable.
+    """
+    saved = getattr(sys, "frozen", None), sys.executable
+    sys.frozen, sys.executable = True, os.path.join(BASE_DIR, "AERIS.exe")
+    try:
+        import core.main as main
+    finally:
+        if saved[0] is None:
+            del sys.frozen
+        else:
+            sys.frozen = saved[0]
+        sys.executable = saved[1]
+    return main
+
+
+main = _import_main()
+
+
+@atexit.register
+def _remove_base_dir():
+    from core import manifest_db
+    manifest_db.close_all()
+    shutil.rmtree(BASE_DIR, ignore_errors=True)
@@ -0,0 +1,73 @@
+import hashlib
+import http.server
+import os
+import re
+import threading
+import urllib.parse
+
+
+class _FileHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def _serve(self, head):
+        server = self.server.owner
+        name = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path.lstrip("/"))
+        server.requests.append((self.command, name, self.headers.get("Range")))
+        path = os.path.join(server.root, name)
+        if not os.path.isfile(path):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with open(path, "rb") as f:
+            data = f.read()
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+
+        start, end, status = 0, len(data) - 1, 200
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match and self.headers.get("If-Range", etag) == etag:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), end) if match.group(2) else end
+            start = min(start + server.range_shift, end)
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", etag)
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+        if not head:
+            self.wfile.write(data[start:end + 1])
+
+
+class FileServer:
+    """
+    Serves the files in root on a local port for tests, with HEAD, ETag and Range support.
+    - requests : (method, file name, Range header) of every request, in order
+    - range_shift : moves the start of every 206 answer, for servers that send the wrong range
+    """
+    def __init__(self, root):
+        self.root = root
+        self.requests = []
+        self.range_shift = 0
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _FileHandler)
+        self._server.owner = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def url(self, name=""):
+        return f"http://127.0.0.1:{self._server.server_port}/{name}"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.aeris_main import BASE_DIR, main
+from core import manifest_db as manifest
+
+
+class DeleteManifestFilesTest(unittest.TestCase):
+    def setUp(self):
+        liveries = os.path.join(tempfile.mkdtemp(dir=BASE_DIR), "liveries")
+        self.folder = os.path.join(liveries, "F4E")
+        self.patches = [
+            mock.patch.object(main, "liveries_folder", liveries, create=True),
+            mock.patch.object(main, "aircrafts", {"delete": {"folder": "F4E"}}, create=True),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+        self.tracked = [os.path.join(self.folder, *parts) for parts in (
+            ("Squadron A", "description.lua"),
+            ("Squadron A", "textures", "tex.dds"),
+            ("Squadron B", "description.lua"),
+        )]
+        for path in self.tracked:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(b"livery")
+        self.gone = os.path.join(self.folder, "Squadron B", "removed.dds")
+        self.tracked_folder = os.path.join(self.folder, "Squadron A")
+        manifest.add_files("delete", [(path, None, None, None, None, None, None)
+                                      for path in self.tracked + [self.gone, self.tracked_folder]])
+
+        # something the user put in a livery folder themselves
+        self.user_file = os.path.join(self.folder, "Squadron B", "notes.txt")
+        with open(self.user_file, "w") as f:
+            f.write("mine")
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        manifest.remove_files("delete", [file_path for file_path, _ in manifest.list_files("delete")])
+
+    def test_removes_tracked_files_and_rows(self):
+        removed, failed = main.delete_manifest_files("delete")
+
+        self.assertEqual(failed, [])
+        self.assertEqual(sorted(removed), sorted(self.tracked + [self.gone, self.tracked_folder]))
+        for path in self.tracked:
+            self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(self.tracked_folder))
+        self.assertEqual(manifest.list_files("delete"), [])
+
+    def test_keeps_files_it_did_not_install(self):
+        main.delete_manifest_files("delete")
+
+        with open(self.user_file) as f:
+            self.assertEqual(f.read(), "mine")
+        self.assertTrue(os.path.isdir(self.folder))
+
+    def test_rows_of_files_that_failed_stay(self):
+        locked = self.tracked[2]
+        real_remove = os.remove
+
+        def remove(path):
+            if path == locked:
+                raise PermissionError(13, "Permission denied", path)
+            real_remove(path)
+
+        with mock.patch.object(os, "remove", side_effect=remove):
+            removed, failed = main.delete_manifest_files("delete")
+
+        self.assertEqual(failed, [locked])
+        self.assertNotIn(locked, removed)
+        self.assertTrue(os.path.exists(locked))
+        self.assertEqual([file_path for file_path, _ in manifest.list_files("delete")], [locked])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import http.server
+import os
+import tempfile
+import threading
+import unittest
+import urllib.parse
+from unittest import mock
+
+from core import http_client
+from tests.file_server import FileServer
+
+VERSION_FILE = b"# header\nrelease-1.0.0\nL1.zip\n"
+ETAG = '"v1"'
+
+
+class _VersionHandler(http.server.BaseHTTPRequestHandler):
+    """Serves VERSION_FILE for any path, also when asked as a proxy (absolute URI)."""
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        _VersionHandler.requests.append((self.path, self.headers.get("If-None-Match")))
+        if urllib.parse.urlsplit(self.path).path != "/version.txt":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(VERSION_FILE)))
+        self.end_headers()
+        self.wfile.write(VERSION_FILE)
+
+
+class CachedFetchTest(unittest.TestCase):
+    def setUp(self):
+        _VersionHandler.requests = []
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _VersionHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        http_client.close_all()
+
+    def _fetch_twice(self, url):
+        first = http_client.fetch_cached(url, self.cache_dir, timeout=5)
+        second = http_client.fetch_cached(url, self.cache_dir, timeout=5)
+        for body_path, _ in (first, second):
+            with open(body_path, "rb") as f:
+                self.assertEqual(f.read(), VERSION_FILE)
+        return first[1], second[1]
+
+    def test_revalidation_serves_cached_body(self):
+        url = f"http://127.0.0.1:{self.server.server_port}/version.txt"
+        self.assertEqual(self._fetch_twice(url), (True, False))
+
+    def test_revalidation_through_proxy(self):
+        # the host does not exist, only the proxy can answer for it
+        proxy = f"http://127.0.0.1:{self.server.server_port}"
+        environment = {"http_proxy": proxy, "HTTP_PROXY": proxy, "no_proxy": "", "NO_PROXY": ""}
+        with mock.patch.dict(os.environ, environment):
+            self.assertEqual(self._fetch_twice("http://aeris-test.invalid/version.txt"), (True, False))
+        self.assertEqual(_VersionHandler.requests, [
+            ("http://aeris-test.invalid/version.txt", None),
+            ("http://aeris-test.invalid/version.txt", ETAG),
+        ])
+
+
+class ResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.body = os.urandom(256 * 1024)
+        with open(os.path.join(self.root, "L1.zip"), "wb") as f:
+            f.write(self.body)
+        self.server = FileServer(self.root)
+        self.target = os.path.join(self.root, "download", "L1.zip")
+        os.makedirs(os.path.dirname(self.target))
+
+    def tearDown(self):
+        self.server.close()
+        http_client.close_all()
+
+    def _leave_part_file(self, size):
+        # what an interrupted download leaves behind
+        url = self.server.url("L1.zip")
+        with open(self.target + http_client.PART_SUFFIX, "wb") as f:
+            f.write(self.body[:size])
+        with http_client.urlopen(url, method="HEAD") as response:
+            http_client._save_part_meta(self.target + http_client.PART_META_SUFFIX, url, response.headers)
+        return url
+
+    def test_resume_requests_only_the_rest(self):
+        url = self._leave_part_file(100000)
+        http_client.download_file(url, self.target, timeout=5)
+        with open(self.target, "rb") as f:
+            self.assertEqual(f.read(), self.body)
+        self.assertEqual(self.server.requests[-1], ("GET", "L1.zip", "bytes=100000-"))
+
+    def test_resume_restarts_on_a_different_range(self):
+        url = self._leave_part_file(100000)
+        self.server.range_shift = 512
+        http_client.download_file(url, self.target, timeout=5)
+        with open(self.target, "rb") as f:
+            self.assertEqual(f.read(), self.body)
+        self.assertEqual(self.server.requests[-1], ("GET", "L1.zip", None))
+
+
+class SegmentedDownloadTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        # an odd length so the last segment is shorter than the others
+        self.body = os.urandom(1000003)
+        with open(os.path.join(self.root, "Big.zip"), "wb") as f:
+            f.write(self.body)
+        self.server = FileServer(self.root)
+        self.target = os.path.join(self.root, "download", "Big.zip")
+        os.makedirs(os.path.dirname(self.target))
+
+    def tearDown(self):
+        self.server.close()
+        http_client.close_all()
+
+    def test_segments_reassemble_the_file(self):
+        http_client.download_segmented(self.server.url("Big.zip"), self.target, segments=4, connections=2, timeout=5)
+        with open(self.target, "rb") as f:
+            self.assertEqual(f.read(), self.body)
+        ranges = sorted(r for method, _, r in self.server.requests if method == "GET")
+        self.assertEqual(ranges, ["bytes=0-250000", "bytes=250001-500001", "bytes=500002-750002", "bytes=750003-1000002"])
+        self.assertFalse(os.path.exists(self.target + http_client.PART_SUFFIX))
+        self.assertFalse(os.path.exists(self.target + http_client.PART_META_SUFFIX))
+
+    def test_wrong_range_is_not_written(self):
+        self.server.range_shift = 512
+        with self.assertRaises(http_client.RangesUnsupported):
+            http_client.download_segmented(self.server.url("Big.zip"), self.target, segments=4, timeout=5)
+        self.assertFalse(os.path.exists(self.target))
+
+
+if __name__ == "__main__":
+    unittest.main()
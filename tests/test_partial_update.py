@@ -0,0 +1,86 @@
+import hashlib
+import os
+import tempfile
+import unittest
+import zipfile
+import zlib
+
+from tests.aeris_main import BASE_DIR, main
+from core import http_client
+from core import manifest_db as manifest
+from tests.file_server import FileServer
+
+MEMBER_SIZE = 128 * 1024
+MEMBERS = [f"Livery/tex{number}.dds" for number in range(6)]
+
+
+def _write_zip(path, members):
+    # stored, so every member keeps its size and place between releases
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+
+class PartialUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(dir=BASE_DIR)
+        self.folder = os.path.join(self.root, "liveries", "F4E")
+        os.makedirs(os.path.join(self.folder, "Livery"))
+        self.zip_path = os.path.join(self.root, "Livery.zip")
+        self.members = {name: os.urandom(MEMBER_SIZE) for name in MEMBERS}
+        _write_zip(self.zip_path, self.members)
+
+        # what extracting the first release recorded
+        entries = []
+        for name, data in self.members.items():
+            path = os.path.join(self.folder, *name.split("/"))
+            with open(path, "wb") as f:
+                f.write(data)
+            entries.append((path, hashlib.md5(data).hexdigest(), zlib.crc32(data), len(data), "Livery.zip", None, None))
+        manifest.add_files("partial", entries)
+
+        self.server = FileServer(self.root)
+
+    def tearDown(self):
+        self.server.close()
+        http_client.close_all()
+
+    def _update(self):
+        return main._partial_update("Livery.zip", self.server.url("Livery.zip"),
+                                    os.path.join(self.folder, "Livery.zip"), "partial", 5, None)
+
+    def test_fetches_only_the_changed_member(self):
+        changed = "Livery/tex1.dds"
+        self.members[changed] = os.urandom(MEMBER_SIZE)
+        _write_zip(self.zip_path, self.members)
+        with zipfile.ZipFile(self.zip_path) as archive:
+            offsets = [info.header_offset for info in archive.infolist()]
+        index = MEMBERS.index(changed)
+        length = os.path.getsize(self.zip_path)
+
+        written, member_info = self._update()
+
+        target = os.path.join(self.folder, "Livery", "tex1.dds")
+        self.assertEqual(written, [target])
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), self.members[changed])
+        self.assertEqual(member_info[target][:2], (zlib.crc32(self.members[changed]), MEMBER_SIZE))
+        # apart from the tail holding the central directory, one range covering that member
+        ranges = [r for method, _, r in self.server.requests if method == "GET" and not r.endswith(f"-{length - 1}")]
+        self.assertEqual(ranges, [f"bytes={offsets[index]}-{offsets[index + 1] - 1}"])
+
+    def test_unchanged_zip_fetches_no_member(self):
+        written, member_info = self._update()
+        self.assertEqual((written, member_info), ([], {}))
+        ranges = [r for method, _, r in self.server.requests if method == "GET"]
+        self.assertEqual(len(ranges), 1)
+
+    def test_too_many_changes_download_everything(self):
+        for name in MEMBERS[:4]:
+            self.members[name] = os.urandom(MEMBER_SIZE)
+        _write_zip(self.zip_path, self.members)
+        self.assertIsNone(self._update())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.aeris_main import BASE_DIR, main
+from core import delta
+from core import http_client
+from core import manifest_db as manifest
+
+
+def _md5(data):
+    return hashlib.md5(data).hexdigest()
+
+
+class PatchChainTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(dir=BASE_DIR)
+        self.server = os.path.join(self.root, "server")
+        self.folder = os.path.join(self.root, "liveries", "F4E")
+        os.makedirs(self.server)
+        os.makedirs(os.path.join(self.folder, "Livery"))
+        self.target = os.path.join(self.folder, "Livery", "tex.dds")
+
+        rng = random.Random(17)
+        self.releases = [bytes(rng.getrandbits(8) for _ in range(256 * 1024))]
+        for edit in (1, 3):
+            data = bytearray(self.releases[-1])
+            start = edit * 64 * 1024
+            data[start:start + 1000] = bytes(rng.getrandbits(8) for _ in range(1000))
+            self.releases.append(bytes(data))
+
+        with open(self.target, "wb") as f:
+            f.write(self.releases[0])
+        manifest.add_file("chain", self.target, _md5(self.releases[0]))
+
+        # Livery_1 turns release 0 into 1, Livery_2 turns 1 into 2
+        for number in (1, 2):
+            base, new = (os.path.join(self.root, f"release{n}.dds") for n in (number - 1, number))
+            for path, data in ((base, self.releases[number - 1]), (new, self.releases[number])):
+                with open(path, "wb") as f:
+                    f.write(data)
+            delta.create_patch(os.path.join(self.server, f"Livery_{number}.aerispatch"), [("Livery/tex.dds", base, new)])
+
+    def _serve(self, url, filename, *args, **kwargs):
+        shutil.copyfile(os.path.join(self.server, os.path.basename(url)), filename)
+        return filename, None
+
+    def test_chain_of_two_patches(self):
+        with mock.patch.object(http_client, "download_file", side_effect=self._serve):
+            result = main._apply_patches(
+                "Livery.zip", "http://mirror.invalid/F4E/Livery.zip", os.path.join(self.folder, "Livery.zip"),
+                "chain", ["Livery_1.aerispatch", "Livery_2.aerispatch"], 5, None
+            )
+
+        self.assertIsNotNone(result, "the chain fell back to a full download")
+        written, member_info = result
+        self.assertEqual(written, [self.target])
+        with open(self.target, "rb") as f:
+            self.assertEqual(f.read(), self.releases[2])
+        self.assertEqual(member_info[self.target][2], _md5(self.releases[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import io
+import os
+import unittest
+import zipfile
+import zlib
+
+from core import ziptools
+
+MEMBERS = {
+    "Livery/description.lua": b"livery = {}\n" * 500,
+    "Livery/tex.dds": os.urandom(3 * ziptools.CHUNK_SIZE // 2),
+    "Livery/empty.txt": b"",
+}
+
+
+class _Unseekable:
+    """Write only file, zipfile then puts sizes and CRCs in data descriptors after each member."""
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+    def flush(self):
+        pass
+
+
+class _Trickle:
+    """Read side of a network stream, hands out at most a few KB per read."""
+    def __init__(self, data, size=4096):
+        self._stream = io.BytesIO(data)
+        self._size = size
+
+    def read(self, size=-1):
+        return self._stream.read(min(size, self._size) if size > 0 else self._size)
+
+
+def _streamed_zip(members, compress_type=zipfile.ZIP_DEFLATED):
+    stream = _Unseekable()
+    with zipfile.ZipFile(stream, "w", compress_type) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return stream.buffer.getvalue()
+
+
+class StreamMembersTest(unittest.TestCase):
+    def test_members_with_data_descriptors(self):
+        data = _streamed_zip(MEMBERS)
+        extracted = {}
+        for member, extract in ziptools.iter_stream_members(_Trickle(data)):
+            self.assertTrue(member.flags & ziptools.FLAG_DATA_DESCRIPTOR)
+            parts = []
+            extract(parts.append)
+            extracted[member.filename] = b"".join(parts)
+            # the sizes and CRC only arrive in the descriptor
+            self.assertEqual(member.file_size, len(extracted[member.filename]))
+            self.assertEqual(member.crc, zlib.crc32(extracted[member.filename]))
+        self.assertEqual(extracted, MEMBERS)
+
+    def test_skipped_members_do_not_shift_the_next(self):
+        data = _streamed_zip(MEMBERS)
+        extracted = {}
+        for member, extract in ziptools.iter_stream_members(_Trickle(data)):
+            if member.filename != "Livery/tex.dds":
+                parts = []
+                extract(parts.append)
+                extracted[member.filename] = b"".join(parts)
+        self.assertEqual(set(extracted), {"Livery/description.lua", "Livery/empty.txt"})
+        self.assertEqual(extracted["Livery/empty.txt"], b"")
+
+    def test_bad_crc_in_data_descriptor(self):
+        data = bytearray(_streamed_zip(MEMBERS))
+        with zipfile.ZipFile(io.BytesIO(bytes(data))) as archive:
+            second = archive.infolist()[1].header_offset
+        # the descriptor before the second header is signature, crc, compressed size, size
+        data[second - 12] ^= 0xFF
+        with self.assertRaises(zipfile.BadZipFile):
+            for member, extract in ziptools.iter_stream_members(_Trickle(bytes(data))):
+                extract(lambda chunk: None)
+
+    def test_stored_member_without_size(self):
+        data = _streamed_zip({"Livery/tex.dds": b"stored"}, zipfile.ZIP_STORED)
+        with self.assertRaises(ziptools.StreamingUnsupported):
+            for member, extract in ziptools.iter_stream_members(_Trickle(data)):
+                extract(lambda chunk: None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -358,7 +358,7 @@ def preset_editor_screen(stdscr):
             
             preset_name = preset.get("name", "")
             preset_folder = preset.get("folder", "")
-            preset_url = preset.get("remote_subfolder", "")
+            preset_url = ", ".join(main.parse_mirror_list(preset.get("remote_subfolder", "")))
             if idx == pad_cursor_y:
                 display_folder = preset_folder
                 display_url = preset_url
@@ -461,7 +461,7 @@ def preset_edit_view(stdscr, preset_data, is_new=False):
         {"y": 4, "x": 2, "label": "Preset ID", "hint": "Unique identifier (used for config & version file).", "value": preset_data.get("id", ""), "edit_type": "text", "validator": validate_preset_id, "can_edit": True},
         {"y": 5, "x": 2, "label": "Preset Name", "hint": "Human-readable name for this preset.", "value": preset_data.get("name", ""), "edit_type": "text", "validator": None, "can_edit": True},
         {"y": 6, "x": 2, "label": "Folder", "hint": "Local DCS aircraft folder to sync to", "value": preset_data.get("folder", ""), "edit_type": "text", "validator": validate_child_folder, "can_edit": True},
-        {"y": 7, "x": 2, "label": "Remote Folder", "hint": "Absolute path to server location for this preset", "value": preset_data.get("remote_subfolder", ""), "edit_type": "text", "validator": validate_url, "can_edit": True},
+        {"y": 7, "x": 2, "label": "Remote Folder", "hint": "Absolute path to server location for this preset, separate mirrors with commas", "value": ", ".join(main.parse_mirror_list(preset_data.get("remote_subfolder", ""))), "edit_type": "text", "validator": validate_mirror_urls, "can_edit": True},
         {"y": 10, "x": 2, "label": "", "edit_type": "save", "hint": "", "value": "Save changes", "validator": None, "can_edit": True},
         {"y": 11, "x": 2, "label": "", "edit_type": "cancel", "hint": "", "value": "Discard changes", "validator": None, "can_edit": True},
         {"y": 13, "x": 2, "label": "", "edit_type": "label", "hint": "", "value": "", "validator": None, "can_edit": False}
@@ -550,7 +550,7 @@ def preset_edit_view(stdscr, preset_data, is_new=False):
                         "preset_version": preset_data.get("preset_version", 2),
                         "name": safe_strip(fields[1]["value"]),
                         "folder": safe_strip(fields[2]["value"]),
-                        "remote_subfolder": safe_strip(fields[3]["value"]) or None,  # convert empty string to None
+                        "remote_subfolder": mirror_list_value(fields[3]["value"]),
                         "date_created": preset_data.get("date_created", timestamp),
                         "last_edited": timestamp
                     }
@@ -755,7 +755,8 @@ def validate_url(url: str) -> bool:
     Validates url on syntax scheme and connection
     """
     import re
-    import urllib
+    import urllib.error
+    from core import http_client
     timeout = 5
     url = url.strip()
     pattern = re.compile(
@@ -768,7 +769,7 @@ def validate_url(url: str) -> bool:
         return False, "Invalid URL format. Must start with http:// or https://"
     
     try:
-        with urllib.request.urlopen(url, timeout=timeout) as response:
+        with http_client.urlopen(url, timeout=timeout) as response:
             code = response.getcode()
             if 200 <= code < 400:
                 return True, f"Server reachable (HTTP {code})"
@@ -813,6 +814,33 @@ def validate_child_folder(path):
     return True, ""
 
 
+def validate_mirror_urls(value: str):
+    """
+    Validates a comma separated list of mirror URLs, each one with validate_url
+    """
+    mirrors = main.parse_mirror_list(value)
+    if not mirrors:
+        return validate_url(value or "")
+    results = [validate_url(url) for url in mirrors]
+    if len(mirrors) == 1:
+        return results[0]
+    failed = [f"{url}: {msg}" for url, (ok, msg) in zip(mirrors, results) if not ok]
+    if failed:
+        return False, "; ".join(failed)
+    return True, f"All {len(mirrors)} mirrors reachable"
+
+
+def mirror_list_value(value: str):
+    """
+    Turn the Remote Folder field into the value saved in the preset:
+    None when empty, a string for one URL, a list for several mirrors
+    """
+    mirrors = main.parse_mirror_list(value)
+    if not mirrors:
+        return None # convert empty string to None
+    return mirrors[0] if len(mirrors) == 1 else mirrors
+
+
 def validate_remote_versions(updated: dict, new_id):
     """
     Validate that our remote subfolder points to a valid version file
@@ -822,26 +850,27 @@ def validate_remote_versions(updated: dict, new_id):
     can save again if failed to overwrite.
     """
     preset_id = new_id
-    remote_subfolder = updated.get("remote_subfolder") or ""
-    if not remote_subfolder:
+    mirrors = main.parse_mirror_list(updated.get("remote_subfolder"))
+    if not mirrors:
         return False, "Remote folder/URL must be defined for this preset."
 
-    if remote_subfolder.startswith(("http://", "https://")):
-        base_url = remote_subfolder.rstrip("/") + "/"
-    else:
-        return False, "Remote folder must be a full URL starting with http:// or https://"
+    # every mirror has to carry the version file
+    for remote_subfolder in mirrors:
+        if remote_subfolder.startswith(("http://", "https://")):
+            base_url = remote_subfolder.rstrip("/") + "/"
+        else:
+            return False, "Remote folder must be a full URL starting with http:// or https://"
 
-    version_file_name = main.version_filename
-    full_version_file = f"{new_id}_{version_file_name}"
-    full_url = f"{base_url}{full_version_file}"
+        version_file_name = main.version_filename
+        full_version_file = f"{new_id}_{version_file_name}"
+        full_url = f"{base_url}{full_version_file}"
 
-    try:
-        if main.get_remote_version(full_url):
-            return True, ""
-        else:
-            return False, f"Cannot find version file at {full_url}"
-    except Exception as e:
-        return False, f"Failed to access remote versions file: {type(e).__name__}: {e}"
+        try:
+            if not main.get_remote_version(full_url):
+                return False, f"Cannot find version file at {full_url}"
+        except Exception as e:
+            return False, f"Failed to access remote versions file: {type(e).__name__}: {e}"
+    return True, ""
     
 def _first_time_config_system(stdscr): 
     curses.curs_set(0)    # hide cursor
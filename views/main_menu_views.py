@@ -82,7 +82,7 @@ def main_menu(stdscr):
         centered_message = (max_x - len(update_message)) // 2
         stdscr.addstr(max_y - 3, centered_message, update_message,  curses.color_pair(ui.COLOR_PAIRS["info window"]))
     current_index = 0
-    selections = ["Choose Preset", "Config", "Start Update", "Quit"]
+    selections = ["Choose Preset", "Config", "Start Update", "Verify Files", "Quit"]
     while True:
         ui.new_menu_vertical(stdscr, y, 2, selections, current_index)
         stdscr.refresh()
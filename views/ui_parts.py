@@ -296,6 +296,27 @@ def truncate_path(path, max_len):
 
     return prefix + truncated
 
+
+def format_size(num_bytes):
+    """Format a byte count for display, eg. 1536 -> '1.5 KB'."""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_duration(seconds):
+    """Format a duration for display, eg. 95 -> '1 min 35 s'."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes} min {seconds} s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes} min"
+
 ### BUTTON CONSTANTS ###
 
 # Standard labels
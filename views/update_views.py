@@ -2,9 +2,11 @@ import curses
 import core.main as main
 import views.ui_parts as ui
 
-def check_updates_screen(stdscr, download_files, delete_folders, aircraft_data):
+def check_updates_screen(stdscr, download_files, delete_folders, aircraft_data, file_info=None, plan=None):
     """
     Just display the update info and get the user's choice: "Apply update" or "Cancel update".
+    file_info holds the sizes from the version file, when present they are shown with a total.
+    plan is the preflight result from main.plan_update, shown as disk space and time estimates.
     Returns the choice.
     """
     stdscr.clear()
@@ -39,10 +41,28 @@ def check_updates_screen(stdscr, download_files, delete_folders, aircraft_data):
 
     pad_lines = []
     
+    file_info = file_info or {}
+    if plan:
+        pad_lines.append(f"Disk space needed: {ui.format_size(plan['required_bytes'])} of {ui.format_size(plan['free_bytes'])} free")
+        if plan["seconds"] is not None:
+            pad_lines.append(f"Estimated time: {ui.format_duration(plan['seconds'])}")
+        if plan["unknown"]:
+            pad_lines.append(f"Size unknown for {len(plan['unknown'])} file(s), not included above")
+        pad_lines.append("")
     if download_files:
-        pad_lines.append("Files to download:")
+        total_size, unknown_sizes = main.get_download_size(download_files, file_info)
+        if total_size:
+            more = f" + {unknown_sizes} of unknown size" if unknown_sizes else ""
+            pad_lines.append(f"Files to download: {ui.format_size(total_size)}{more}")
+        else:
+            pad_lines.append("Files to download:")
         for file in download_files:
-            pad_lines.append(f"- {ui.truncate_path(file, max_x - 7)}")
+            size = file_info.get(file, {}).get("size")
+            if size is None:
+                pad_lines.append(f"- {ui.truncate_path(file, max_x - 7)}")
+            else:
+                size_text = f" ({ui.format_size(size)})"
+                pad_lines.append(f"- {ui.truncate_path(file, max_x - 7 - len(size_text))}{size_text}")
         pad_lines.append("")
     
     if delete_folders:
@@ -105,10 +125,11 @@ def check_updates_screen(stdscr, download_files, delete_folders, aircraft_data):
             break
 
 
-def download_status_screen(stdscr, aircraft_data, download_files):
+def download_status_screen(stdscr, aircraft_data, download_files, file_info=None):
     """
     Display the download progress pad using the callback provided by the controller.
     Controller passes a callback for updating the pad.
+    file_info is handed to main.process_downloads for scheduling and verification.
 
     return file_statuses[key] = {
         "text": text, 
@@ -218,7 +239,7 @@ def download_status_screen(stdscr, aircraft_data, download_files):
         stdscr.refresh()
     
     # call downloads synchronously
-    main.process_downloads(download_files, aircraft_data["id"], update_callback=update_callback)
+    main.process_downloads(download_files, aircraft_data["id"], update_callback=update_callback, file_info=file_info)
 
     
     stdscr.refresh()
@@ -720,4 +741,93 @@ def delete_summary_screen(stdscr, folder_statuses, aircraft_data):
             return
         # quit
         if ui.is_quit(key):
-            break
\ No newline at end of file
+            break
+
+def verify_status_screen(stdscr, aircraft_data):
+    """
+    Display the verify progress pad, one line per zip as its files are checked.
+    Runs main.verify_installation synchronously and returns its report.
+    """
+    stdscr.clear()
+    stdscr.refresh()
+    curses.curs_set(0)
+    max_y, max_x = stdscr.getmaxyx()
+
+    # title and disclaimer
+    ui.show_title(stdscr)
+    ui.draw_disclaimer(stdscr)
+
+    verify_for = f"Verifying installed files of: {aircraft_data['name']}"
+    verify_version = f"Installed version: {aircraft_data['local_version']}"
+    verify_in = f"Target folder: {ui.truncate_path(aircraft_data['target_folder'], 50)}"
+
+    y = 4
+    stdscr.addstr(y, 2, verify_for, curses.A_BOLD)
+    y += 1
+    stdscr.addstr(y, 2, verify_version, curses.A_DIM)
+    y += 1
+    stdscr.addstr(y, 2, verify_in, curses.A_DIM)
+    y += 2
+    stdscr.addstr(y, 2, "Checking files against their recorded checksums:", curses.A_BOLD)
+    y += 1
+    stdscr.hline(y, 2, curses.ACS_HLINE, max_x - 4)
+
+    stdscr.hline(max_y - 2, 2, curses.ACS_HLINE, max_x -4)
+
+    pad_top = y + 1
+    pad_bottom = max_y - 3
+    pad_height_visible = pad_bottom - pad_top + 1
+    pad_width = max_x - 5
+    pad_y = 0
+
+    # initialize pad
+    pad = curses.newpad(pad_height_visible, pad_width)
+    pad.bkgd(" ", curses.color_pair(ui.COLOR_PAIRS["dark amber"]))
+    line_count = 0
+
+    def update_callback(text, file=None, action=None, done=False, error=False):
+        nonlocal pad_y, pad, line_count
+
+        if error:
+            attr = curses.color_pair(ui.COLOR_PAIRS["status red"]) | curses.A_BOLD
+        elif done:
+            attr = curses.color_pair(ui.COLOR_PAIRS["status green"])
+        else:
+            attr = curses.A_NORMAL
+
+        # every zip reports once, when all of its files are checked
+        line_y = line_count
+        line_count += 1
+
+        # Resize pad if needed
+        current_pad_height = pad.getmaxyx()[0]
+        if line_y >= current_pad_height:
+            pad.resize(line_y + 5, pad_width)
+
+        safe_text = text.encode('ascii', 'replace').decode()
+        formatted_line = f"{(action or '').upper():<10} {ui.truncate_path(safe_text, pad_width - 12)}"
+        pad.addstr(line_y, 0, formatted_line, attr)
+
+        # auto scroll pad
+        pad_y = max(0, line_y - pad_height_visible + 1)
+        pad.refresh(pad_y, 0, pad_top, 2, pad_bottom, max_x - 2)
+
+        # draw scrollbar when needed
+        if line_count > pad_height_visible:
+            ui.draw_pad_scrollbar(
+                stdscr,
+                pad_y,
+                line_count,
+                pad_height_visible,
+                pad_top,
+                pad_bottom,
+                pad_width=max_x-3
+            )
+
+        ui.draw_disclaimer(stdscr)
+        stdscr.refresh()
+
+    report = main.verify_installation(aircraft_data["id"], update_callback=update_callback)
+
+    stdscr.refresh()
+    return report